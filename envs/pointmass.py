@@ -8,6 +8,50 @@ from gym.error import DependencyNotInstalled
 import math
 import random
 
+try:
+    from numba import njit
+except ImportError:     # numba is optional; the kernel then runs as pure Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def _step_kernel(x, dx, y, dy, ax, ay, dt, max_x, max_vx, max_y, max_vy, max_acc,
+                 check_vel_bounds):
+    # Fused action clamp + closed-form double-integrator update + state clip
+    ax = min(max(ax, -max_acc), max_acc)
+    ay = min(max(ay, -max_acc), max_acc)
+    x = x + dx * dt + 0.5 * ax * dt * dt
+    dx = dx + ax * dt
+    y = y + dy * dt + 0.5 * ay * dt * dt
+    dy = dy + ay * dt
+    x = min(max(x, -max_x), max_x)
+    dx = min(max(dx, -max_vx), max_vx)
+    y = min(max(y, -max_y), max_y)
+    dy = min(max(dy, -max_vy), max_vy)
+    # Out-of-bounds flag for _is_done, fused here so the whole
+    # update/clip/check pipeline is one compiled call (velocity bounds only
+    # apply during training, see _is_done)
+    oob = not (-max_x + 1e-4 < x < max_x - 1e-4 and
+               -max_y + 1e-4 < y < max_y - 1e-4)
+    if check_vel_bounds and not oob:
+        oob = not (-max_vx + 1e-4 < dx < max_vx - 1e-4 and
+                   -max_vy + 1e-4 < dy < max_vy - 1e-4)
+    return x, dx, y, dy, oob
+
+
+def _collect_episode_range(args):
+    '''
+        Worker for PointMassEnv.make_dataset_parallel: builds its own env so no
+        state is shared across processes and collects a slice of the episodes.
+    '''
+    env_kwargs, start, stop = args
+    env_kwargs = dict(env_kwargs, seed=env_kwargs.get('seed', 0) + start)
+    env = PointMassEnv(**env_kwargs)
+    return env._make_dataset_range(start, stop)
+
 
 class PointMassEnv(core.Env):
 
@@ -16,6 +60,7 @@ class PointMassEnv(core.Env):
     dt = 0.1
 
     MASS = 1        # [kg]  Mass of the quadrotor
+    _INV_MASS = 1.0 / MASS
 
     MAX_X = 5       # [m]   Maximum and minimum values of the x position
     MAX_Y = 5       # [m]   Maximum and minimum values of the y position
@@ -42,6 +87,19 @@ class PointMassEnv(core.Env):
         self.isopen = True
         self.name = "PointMassEnv"
         self.theta_as_sine_cosine = theta_as_sine_cosine
+
+        # Keep the constructor arguments so worker processes can rebuild the env
+        self._init_kwargs = dict(
+            target=target, max_steps=max_steps, num_episodes=num_episodes,
+            epsilon=epsilon, reset_target_reached=reset_target_reached,
+            reset_out_of_bounds=reset_out_of_bounds, bonus_reward=bonus_reward,
+            initial_state=initial_state, theta_as_sine_cosine=theta_as_sine_cosine,
+            n_moving_obstacles_box=n_moving_obstacles_box,
+            n_static_obstacles_box=n_static_obstacles_box,
+            n_moving_obstacles_circle=n_moving_obstacles_circle,
+            n_static_obstacles_circle=n_static_obstacles_circle,
+            reward=reward, test=test, seed=seed,
+        )
         
         # Observation space bounds
         obs_high = np.array(
@@ -54,6 +112,10 @@ class PointMassEnv(core.Env):
             [self.MAX_X, self.MAX_VEL_X, self.MAX_Y, self.MAX_VEL_Y], dtype=np.float32
         )
         state_low = -state_high
+        # Keep the bound arrays around so per-step checks can clip/compare the
+        # whole state in one vectorized call instead of per-component bound()
+        self._state_low = state_low
+        self._state_high = state_high
 
         # Action space bounds
         action_low = np.array([-self.MAX_ACC, -self.MAX_ACC], dtype=np.float32)
@@ -62,7 +124,13 @@ class PointMassEnv(core.Env):
         self.state_space = spaces.Box(low=state_low, high=state_high, dtype=np.float32, seed=seed)
         self.observation_space = spaces.Box(low=obs_low, high=obs_high, dtype=np.float32, seed=seed)
         self.action_space = spaces.Box(low=action_low, high=action_high, dtype=np.float32, seed=seed)
-        self.state = None
+        # The state is kept as four scalar attributes (structure of arrays);
+        # scalar reads avoid the ndarray indexing overhead on the step hot path
+        # and feed the jitted kernel directly. External callers go through the
+        # state property below.
+        self._x = self._dx = self._y = self._dy = None
+        self._prev_x = self._prev_dx = self._prev_y = self._prev_dy = None
+        self._obs_buf = np.empty(6, dtype=np.float32)
 
         self.n_moving_obstacles_box = n_moving_obstacles_box
         self.n_static_obstacles_box = n_static_obstacles_box
@@ -79,10 +147,7 @@ class PointMassEnv(core.Env):
             self.target = target
             self.random_target = False
         else:
-            is_valid = False
-            while not is_valid:
-                self.target = self._sample_target()
-                is_valid = self._check_target(self.target)
+            self.target = self._sample_target()
             self.random_target = True
         self.max_steps = max_steps
         self._max_episode_steps = max_steps      # For compatibility with diffuser
@@ -93,10 +158,43 @@ class PointMassEnv(core.Env):
         self.reset_out_of_bounds = reset_out_of_bounds
         self.reward = reward
         self.bonus_reward = bonus_reward
-        self.initial_state = initial_state
+        # Cast once so the state stays float32 end-to-end (the spaces are float32
+        # and a float64 state would force a downcast copy in every observation)
+        self.initial_state = None if initial_state is None else \
+            np.asarray(initial_state, dtype=np.float32)
         self.test = test
         self.seed = seed
 
+        # Trigger the JIT compile once so the first step is not slowed down
+        self._oob = False
+        _step_kernel(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, self.dt,
+                     float(self.MAX_X), float(self.MAX_VEL_X),
+                     float(self.MAX_Y), float(self.MAX_VEL_Y), float(self.MAX_ACC),
+                     not self.test)
+
+    @property
+    def state(self):
+        # Materialize the 4-vector only when somebody asks for it
+        if self._x is None:
+            return None
+        return np.array([self._x, self._dx, self._y, self._dy], dtype=np.float32)
+
+    @state.setter
+    def state(self, value):
+        if value is None:
+            self._x = self._dx = self._y = self._dy = None
+        else:
+            self._x = float(value[0])
+            self._dx = float(value[1])
+            self._y = float(value[2])
+            self._dy = float(value[3])
+
+    @property
+    def prev_state(self):
+        if self._prev_x is None:
+            return None
+        return np.array([self._prev_x, self._prev_dx, self._prev_y, self._prev_dy], dtype=np.float32)
+
     def reset(
         self,
         *,
@@ -105,7 +203,7 @@ class PointMassEnv(core.Env):
         options: Optional[dict] = None
     ):
         super().reset(seed=seed)
-        
+
         if self.n_obstacles > 0:
             self._generate_obstacles()
 
@@ -114,40 +212,54 @@ class PointMassEnv(core.Env):
             self.state = self.initial_state
         else:
             while not is_valid:
-                self.state = self.state_space.sample()
+                state = self.state_space.sample()
                 if self.test:
-                    self.state[[1, 3]] = 0        # Start with zero velocity for testing
-                is_valid = self._check_initial_pos(self.state) and self._check_initial_vel(self.state)
+                    state[[1, 3]] = 0        # Start with zero velocity for testing
+                is_valid = self._check_initial_pos(state) and self._check_initial_vel(state)
+            self.state = state
         self.timestep = 0
+        self._oob = False
         if self.random_target:
-            is_valid = False
-            while not is_valid:
-                self.target = self._sample_target()
-                is_valid = self._check_target(self.target)
+            self.target = self._sample_target()
         self.target_reached = False
 
+        # Return a copy here since the initial observation is typically retained
         if not return_info:
-            return self._get_ob()
+            return self._get_ob().copy()
         else:
-            return self._get_ob(), {}
+            return self._get_ob().copy(), {}
 
     def _sample_target(self, seed=None):
-        # Random x/y target position in [-self.MAX_X/Y, self.MAX_X/Y]
-        x = 2 * self.MAX_X * (self.np_random.rand() - 0.5)
-        y = 2 * self.MAX_Y * (self.np_random.rand() - 0.5)
-
-        return (x, y)
+        # Random x/y target position in [-self.MAX_X/Y, self.MAX_X/Y]. A batch
+        # of candidates is drawn at once and filtered against the distance
+        # constraint with one vectorized comparison, so the rejection sampling
+        # almost never needs a second RNG call
+        while True:
+            cands = self.np_random.uniform(
+                [-self.MAX_X, -self.MAX_Y], [self.MAX_X, self.MAX_Y], size=(32, 2)
+            )
+            if self._x is not None:
+                dists = np.hypot(cands[:, 0] - self._x, cands[:, 1] - self._y)
+                cands = cands[dists > self.epsilon]
+            if self.n_static_obstacles_box > 0 or self.n_static_obstacles_circle > 0:
+                # The static-obstacle checks stay per-candidate, but only run
+                # on candidates that already passed the distance filter
+                for x, y in cands:
+                    if self._check_target((x, y)):
+                        return (x, y)
+            elif len(cands) > 0:
+                return (cands[0, 0], cands[0, 1])
 
     def _check_target(self, target):
         obstacle_distance = 0.2
         
         # Check if the target is at least epsilon away from the initial position
-        if self.state is not None:
-            p = self._get_coordinates(self.state)
-            distance = np.linalg.norm(np.array(p) - np.array(target))
+        if self._x is not None:
+            # math.hypot on scalars avoids building arrays for a 2-element norm
+            distance = math.hypot(self._x - target[0], self._y - target[1])
             if distance <= self.epsilon:
                 return False
-            
+
         if self.n_static_obstacles_box > 0:
             for i in np.arange(self.n_moving_obstacles_box, self.n_obstacles_box):          # Check that the target is not inside any obstacle
                 obstacle = self.obstacles[i]
@@ -160,7 +272,7 @@ class PointMassEnv(core.Env):
         if self.n_static_obstacles_circle > 0:
             for i in np.arange(self.n_obstacles_box + self.n_moving_obstacles_circle, self.n_obstacles):      # Check that the target is not inside any obstacle
                 obstacle = self.obstacles[i]
-                distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(target))
+                distance = math.hypot(obstacle['x'] - target[0], obstacle['y'] - target[1])
                 if distance <= obstacle['r'] + obstacle_distance:
                     return False
 
@@ -169,23 +281,25 @@ class PointMassEnv(core.Env):
     def _check_initial_pos(self, state):
         obstacle_distance = 1.0
 
-        p = self._get_coordinates(state)
+        # Work on the scalar coordinates directly instead of going through
+        # the list that _get_coordinates builds
+        x, y = state[0], state[2]
         if self.target is not None:
-            distance = np.linalg.norm(np.array(p) - np.array(self.target))
+            distance = math.hypot(x - self.target[0], y - self.target[1])
             if distance <= self.epsilon:
                 return False
-        
+
         if self.n_obstacles > 0:
             for i in range(self.n_obstacles):
                 obstacle = self.obstacles[i]
                 if 'd' in obstacle:
-                    if p[0] >= obstacle['x'] - obstacle['d'] / 2 - obstacle_distance and \
-                        p[0] <= obstacle['x'] + obstacle['d'] / 2 + obstacle_distance and \
-                        p[1] >= obstacle['y'] - obstacle['d'] / 2 - obstacle_distance and \
-                        p[1] <= obstacle['y'] + obstacle['d'] / 2 + obstacle_distance:
+                    if x >= obstacle['x'] - obstacle['d'] / 2 - obstacle_distance and \
+                        x <= obstacle['x'] + obstacle['d'] / 2 + obstacle_distance and \
+                        y >= obstacle['y'] - obstacle['d'] / 2 - obstacle_distance and \
+                        y <= obstacle['y'] + obstacle['d'] / 2 + obstacle_distance:
                         return False
                 if 'r' in obstacle:
-                    distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(p))
+                    distance = math.hypot(obstacle['x'] - x, obstacle['y'] - y)
                     if distance <= obstacle['r'] + obstacle_distance:
                         return False
 
@@ -300,31 +414,26 @@ class PointMassEnv(core.Env):
         #     self.obstacles.append({'x': x, 'y': y, 'vx': 0, 'vy': 0, 'r': r})
 
     def step(self, a):
-        s = self.state
-        assert s is not None, "Call reset before using AcrobotEnv object."
+        assert self._x is not None, "Call reset before using AcrobotEnv object."
         acc = a
 
-        #add torque limit
-        acc = np.clip(acc, a_min=-self.MAX_ACC, a_max=self.MAX_ACC)
-
         # Add noise to the force action
         if self.acc_noise_max > 0:
-            acc += self.np_random.uniform(
+            acc = acc + self.np_random.uniform(
                 -self.acc_noise_max, self.acc_noise_max
             )
 
-        # Now, augment the state with our force action so it can be passed to _dsdt
-        s_augmented = np.append(s, acc)
-
-        ns = rk4(self._dsdt, s_augmented, [0, self.dt])
-
-        ns[0] = bound(ns[0], -self.MAX_X, self.MAX_X)
-        ns[1] = bound(ns[1], -self.MAX_VEL_X, self.MAX_VEL_X)
-        ns[2] = bound(ns[2], -self.MAX_Y, self.MAX_Y)
-        ns[3] = bound(ns[3], -self.MAX_VEL_Y, self.MAX_VEL_Y)
-
-        self.prev_state = self.state
-        self.state = ns
+        # The whole state update (action clamp, closed-form double-integrator
+        # update, state clip) runs in a single jitted kernel on the scalar state
+        self._prev_x, self._prev_dx = self._x, self._dx
+        self._prev_y, self._prev_dy = self._y, self._dy
+        self._x, self._dx, self._y, self._dy, self._oob = _step_kernel(
+            self._x, self._dx, self._y, self._dy,
+            float(acc[0]), float(acc[1]), self.dt,
+            float(self.MAX_X), float(self.MAX_VEL_X),
+            float(self.MAX_Y), float(self.MAX_VEL_Y), float(self.MAX_ACC),
+            not self.test
+        )
 
         # Move box-shaped obstacles
         if self.n_moving_obstacles_box > 0:
@@ -354,6 +463,9 @@ class PointMassEnv(core.Env):
                 obstacle['x'] += obstacle['vx'] * self.dt
                 obstacle['y'] += obstacle['vy'] * self.dt
 
+        # The distance to the target feeds both the done check and the reward,
+        # so compute it once per step
+        self._distance = self._get_distance_to_target()
         done = self._is_done()
         reward = self._get_reward()
 
@@ -368,8 +480,7 @@ class PointMassEnv(core.Env):
         m = self.MASS
 
         # Unpack the state
-        s = self.state
-        dx, dy = s[1], s[3]
+        dx, dy = self._dx, self._dy
         dx_next, dy_next = s_next[1], s_next[3]
 
         # Get accelerations
@@ -442,84 +553,162 @@ class PointMassEnv(core.Env):
         return predictions
 
     def make_dataset(self):
-        dataset = {}
-        keys = ['observations', 'actions', 'rewards', 'terminals', 'timeouts']
+        dataset = self._make_dataset_range(0, self.num_episodes)
+
+        print("Dataset shape: ", dataset['observations'].shape)
+        # print("Observation limits: ", np.min(dataset['observations'], axis=0), np.max(dataset['observations'], axis=0))
+        # print("Action limits: ", np.min(dataset['actions'], axis=0), np.max(dataset['actions'], axis=0))
+
+        return dataset
+
+    def make_dataset_parallel(self, num_workers=None):
+        '''
+            Generate the dataset with the episodes split across worker processes.
+            Episodes are independent, so this scales close to linearly with the
+            number of cores.
+        '''
+        import multiprocessing as mp
+
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        num_workers = min(num_workers, self.num_episodes)
+
+        bounds = np.linspace(0, self.num_episodes, num_workers + 1, dtype=int)
+        jobs = [(self._init_kwargs, int(bounds[i]), int(bounds[i + 1]))
+                for i in range(num_workers) if bounds[i] < bounds[i + 1]]
+
+        with mp.Pool(len(jobs)) as pool:
+            results = pool.map(_collect_episode_range, jobs)
+
+        dataset = {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+        print("Dataset shape: ", dataset['observations'].shape)
+
+        return dataset
+
+    def _make_dataset_range(self, start, stop):
+        # Preallocate the observation/action arrays once and fill rows through a
+        # write cursor instead of growing Python lists and converting at the end
+        capacity = (stop - start) * self.max_steps
+        obs_buf = np.empty((capacity, 6), dtype=np.float32)
+        act_buf = np.empty((capacity, 2), dtype=np.float32)
+        rewards = []
+        terminals = []
+        timeouts = []
+        k = 0
+
+        # Per-episode scratch buffers, overwritten each episode; accepted
+        # episodes are copied out, so the inner loop does no list appends
+        rew_scratch = np.empty(self.max_steps, dtype=np.float32)
+        term_scratch = np.empty(self.max_steps, dtype=bool)
+
+        # All action randomness comes from one PCG64 generator, drawn as a
+        # single contiguous block up front; that is both faster than per-step
+        # RNG calls and keeps the action stream independent of the per-episode
+        # env reseeding done by reset()
+        rng = np.random.default_rng(self.seed + start)
+        action_blocks = rng.uniform(
+            -self.MAX_ACC, self.MAX_ACC,
+            size=(stop - start, self.max_steps, 2)
+        ).astype(np.float32)
+
+        episode = start
+        while episode < stop:
 
-        dataset = {key: [] for key in keys}
-        
-        episode = 0
-        while episode < self.num_episodes:
-          
             state = self.reset(seed=episode)
 
-            dataset_episode = {key: [] for key in keys}
+            k0 = k
+            length = 0
+
+            action_pool = action_blocks[episode - start]
 
             for step in range(self.max_steps):
-                action = self.sample_action()
+                action = action_pool[step]
+                # Store the row before stepping: state may alias the shared
+                # observation buffer that step() overwrites in place
+                obs_buf[k] = state
+                act_buf[k] = action
                 next_state, reward, done, target_reached = self.step(action)
-                
-                dataset_episode['observations'].append(state)
-                dataset_episode['actions'].append(action)
-                dataset_episode['rewards'].append([reward])
-                dataset_episode['terminals'].append([done])
-                dataset_episode['timeouts'].append([0 if step < self.max_steps - 1 else 1])
+
+                k += 1
+                rew_scratch[step] = reward
+                term_scratch[step] = done
+                length = step + 1
 
                 state = next_state
                 if done:
                     break
-            
-            if len(dataset_episode['rewards']) < 16:
+
+            if length < 16:
+                k = k0      # Rewind the cursor to discard the too-short episode
+                # Redraw the actions for the retry, otherwise the episode
+                # (same seed, same actions) would repeat deterministically
+                action_blocks[episode - start] = rng.uniform(
+                    -self.MAX_ACC, self.MAX_ACC, size=(self.max_steps, 2)
+                )
                 continue
-            
+
             episode += 1
 
             if episode % 2000 == 0:
                 print("Generated training episode %d of %d" % (episode, self.num_episodes))
 
-            for key in keys:
-                dataset[key].extend(dataset_episode[key])
-
-        # Convert lists to numpy arrays
-        for key in dataset.keys():
-            dataset[key] = np.array(dataset[key])
-
-        print("Dataset shape: ", dataset['observations'].shape)
-        # print("Observation limits: ", np.min(dataset['observations'], axis=0), np.max(dataset['observations'], axis=0))
-        # print("Action limits: ", np.min(dataset['actions'], axis=0), np.max(dataset['actions'], axis=0))
-
-        return dataset
+            rewards.append(rew_scratch[:length].copy())
+            terminals.append(term_scratch[:length].copy())
+            # Only the final step of a full-length episode is a timeout
+            episode_timeouts = np.zeros(length, dtype=bool)
+            episode_timeouts[-1] = length == self.max_steps
+            timeouts.append(episode_timeouts)
+
+        return {
+            'observations': obs_buf[:k],
+            'actions': act_buf[:k],
+            'rewards': np.concatenate(rewards).reshape(-1, 1),
+            'terminals': np.concatenate(terminals).reshape(-1, 1),
+            'timeouts': np.concatenate(timeouts).reshape(-1, 1),
+        }
     
     def get_dataset(self):
-        path = 'training_data/pointmass_dataset.pkl'
-        # Check if there is a file at the specified path
+        path = 'training_data/pointmass_dataset.npz'
+        legacy_path = 'training_data/pointmass_dataset.pkl'
+        # Check if there is a file at the specified path; npz stores the arrays
+        # directly, which loads much faster than unpickling the dataset dict
         try:
-            with open(path, 'rb') as f:
-                dataset = pickle.load(f)
+            with np.load(path) as data:
+                dataset = dict(data)
         except FileNotFoundError:
-            dataset = self.make_dataset()
-            with open(path, 'wb') as f:
-                pickle.dump(dataset, f)
+            try:
+                # Fall back to caches written by older versions
+                with open(legacy_path, 'rb') as f:
+                    dataset = pickle.load(f)
+            except FileNotFoundError:
+                dataset = self.make_dataset()
+                np.savez(path, **dataset)
 
         return dataset
 
     def _get_ob(self):
-        s = self.state
-        assert s is not None, "Call reset before using PointmassEnv object."
-        return np.array(
-            [s[0], s[1], s[2], s[3], self.target[0], self.target[1]], dtype=np.float32
-        )
+        assert self._x is not None, "Call reset before using PointmassEnv object."
+        # Reuse a preallocated buffer instead of allocating a fresh array per step;
+        # callers that retain observations across steps have to copy
+        b = self._obs_buf
+        b[0] = self._x
+        b[1] = self._dx
+        b[2] = self._y
+        b[3] = self._dy
+        b[4] = self.target[0]
+        b[5] = self.target[1]
+        return b
 
     def _get_coordinates(self, state):
         p = [state[0], state[2]]
         return p
 
     def _get_distance_to_target(self):
-        p = self._get_coordinates(self.state)
-        distance = np.linalg.norm(np.array(p) - np.array(self.target))
-        return distance
+        return math.hypot(self._x - self.target[0], self._y - self.target[1])
 
     def _get_reward(self):
-        distance = self._get_distance_to_target()
+        distance = self._distance       # Cached in step
         reward = -distance ** 2 if self.reward == 'squared_distance' else -distance
         # reward = -distance
         if distance <= self.epsilon:
@@ -527,38 +716,33 @@ class PointMassEnv(core.Env):
                 reward += 1000.0
         return reward
 
-    def _is_done(self):   
+    def _is_done(self):
         if self.reset_target_reached:
-            distance = self._get_distance_to_target()
+            distance = self._distance       # Cached in step
             if distance <= self.epsilon:
                 self.target_reached = True
                 return True
             
         if self.reset_out_of_bounds:
-            if not self.test:       # If the environment is being used for training, the agent should not be allowed to go out of bounds
-                if self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
-                    self.state[1] <= -self.MAX_VEL_X + 1e-4 or self.state[1] >= self.MAX_VEL_X - 1e-4 or \
-                    self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4 or \
-                    self.state[3] <= -self.MAX_VEL_Y + 1e-4 or self.state[3] >= self.MAX_VEL_Y - 1e-4:
-                    # print("Out of bounds!!!")
-                    return True
-            else:                   # If the environment is being used for testing, the agent is allowed to exceed the velocity bounds
-                if self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
-                    self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4:
-                    return True
+            # The bounds check is fused into the step kernel; during training
+            # the velocity bounds count as well, during testing only the
+            # position bounds do (the kernel receives the mode as a flag)
+            if self._oob:
+                # print("Out of bounds!!!")
+                return True
         
         if self.n_obstacles > 0:
             for i in range(self.n_obstacles):
                 obstacle = self.obstacles[i]
                 if 'd' in obstacle:
-                    if self.state[0] >= obstacle['x'] - obstacle['d'] / 2 and \
-                        self.state[0] <= obstacle['x'] + obstacle['d'] / 2 and \
-                        self.state[2] >= obstacle['y'] - obstacle['d'] / 2 and \
-                        self.state[2] <= obstacle['y'] + obstacle['d'] / 2:
+                    if self._x >= obstacle['x'] - obstacle['d'] / 2 and \
+                        self._x <= obstacle['x'] + obstacle['d'] / 2 and \
+                        self._y >= obstacle['y'] - obstacle['d'] / 2 and \
+                        self._y <= obstacle['y'] + obstacle['d'] / 2:
                         self.target_reached = -1
                         return True
                 if 'r' in obstacle:
-                    distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(self._get_coordinates(self.state)))
+                    distance = math.hypot(obstacle['x'] - self._x, obstacle['y'] - self._y)
                     if distance <= obstacle['r']:
                         self.target_reached = -1
                         return True
@@ -587,17 +771,16 @@ class PointMassEnv(core.Env):
         return False    
 
     def _dsdt(self, s_augmented):
-        # Get parameters
-        m = self.MASS
-
         # Unpack the state and action
         a1 = s_augmented[-2]
         a2 = s_augmented[-1]
         s = s_augmented[:-1]
         _, dx, _, dy = s[0], s[1], s[2], s[3]
 
-        ddx = 1 / m * a1
-        ddy = 1 / m * a2
+        # MASS is a constant class attribute, so the division is folded at
+        # import time instead of being re-evaluated on every call
+        ddx = self._INV_MASS * a1
+        ddy = self._INV_MASS * a2
 
         return (dx, ddx, dy, ddy, 0.0, 0.0)
     
@@ -670,6 +853,166 @@ class PointMassEnv(core.Env):
 
         return self.isopen
 
+
+class PointMassVecEnv:
+    '''
+        Vectorized batch of point mass environments for fast dataset generation.
+        Holds the states of N independent point masses as a single (N, 4) float32
+        array and advances all of them with one set of numpy array operations per
+        step. Only the obstacle-free configuration used for dataset generation is
+        supported; use PointMassEnv for single rollouts with obstacles.
+    '''
+
+    def __init__(self, num_envs=32, max_steps=100, num_episodes=1000, epsilon=0.2,
+                 reset_target_reached=False, reset_out_of_bounds=False,
+                 reward='squared_distance', seed=0):
+        self.num_envs = num_envs
+        self.dt = PointMassEnv.dt
+        self.MAX_X = PointMassEnv.MAX_X
+        self.MAX_Y = PointMassEnv.MAX_Y
+        self.MAX_VEL_X = PointMassEnv.MAX_VEL_X
+        self.MAX_VEL_Y = PointMassEnv.MAX_VEL_Y
+        self.MAX_ACC = PointMassEnv.MAX_ACC
+
+        self.max_steps = max_steps
+        self.num_episodes = num_episodes
+        self.epsilon = epsilon
+        self.reset_target_reached = reset_target_reached
+        self.reset_out_of_bounds = reset_out_of_bounds
+        self.reward = reward
+
+        self._state_high = np.array(
+            [self.MAX_X, self.MAX_VEL_X, self.MAX_Y, self.MAX_VEL_Y], dtype=np.float32
+        )
+        self._state_low = -self._state_high
+        self._state_high_eps = self._state_high - 1e-4
+        self._state_low_eps = self._state_low + 1e-4
+
+        self.np_random = np.random.default_rng(seed)
+        self.states = np.empty((num_envs, 4), dtype=np.float32)
+        self.targets = np.empty((num_envs, 2), dtype=np.float32)
+        self.timestep = np.zeros(num_envs, dtype=np.int64)
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_obs()
+
+    def _reset_envs(self, mask):
+        # Rejection-sample states and targets for the masked envs until all are valid
+        idx = np.flatnonzero(mask)
+        while idx.size > 0:
+            n = idx.size
+            states = self.np_random.uniform(
+                self._state_low, self._state_high, size=(n, 4)
+            ).astype(np.float32)
+            targets = self.np_random.uniform(
+                [-self.MAX_X, -self.MAX_Y], [self.MAX_X, self.MAX_Y], size=(n, 2)
+            ).astype(np.float32)
+            self.states[idx] = states
+            self.targets[idx] = targets
+            valid = self._check_initial_vel(states) & \
+                (np.hypot(states[:, 0] - targets[:, 0], states[:, 2] - targets[:, 1]) > self.epsilon)
+            idx = idx[~valid]
+        self.timestep[mask] = 0
+
+    def _check_initial_vel(self, states):
+        # Ensure that the agents can avoid going out of bounds with maximum acceleration
+        stop_x = states[:, 0] + np.sign(states[:, 1]) * 0.5 * states[:, 1] ** 2 / self.MAX_ACC
+        stop_y = states[:, 2] + np.sign(states[:, 3]) * 0.5 * states[:, 3] ** 2 / self.MAX_ACC
+        return (np.abs(stop_x) <= self.MAX_X) & (np.abs(stop_y) <= self.MAX_Y)
+
+    def step(self, a):
+        a = np.clip(a, -self.MAX_ACC, self.MAX_ACC)
+        s = self.states
+        dt = self.dt
+        s[:, 0] += s[:, 1] * dt + 0.5 * a[:, 0] * dt * dt
+        s[:, 1] += a[:, 0] * dt
+        s[:, 2] += s[:, 3] * dt + 0.5 * a[:, 1] * dt * dt
+        s[:, 3] += a[:, 1] * dt
+        np.clip(s, self._state_low, self._state_high, out=s)
+
+        distance = np.hypot(s[:, 0] - self.targets[:, 0], s[:, 2] - self.targets[:, 1])
+        reward = -distance ** 2 if self.reward == 'squared_distance' else -distance
+
+        target_reached = np.zeros(self.num_envs, dtype=bool)
+        done = self.timestep == self.max_steps - 1
+        if self.reset_target_reached:
+            target_reached = distance <= self.epsilon
+            done |= target_reached
+        if self.reset_out_of_bounds:
+            done |= ((s <= self._state_low_eps) | (s >= self._state_high_eps)).any(axis=1)
+
+        self.timestep += 1
+        return (self._get_obs(), reward, done, target_reached)
+
+    def _get_obs(self):
+        obs = np.empty((self.num_envs, 6), dtype=np.float32)
+        obs[:, :4] = self.states
+        obs[:, 4:] = self.targets
+        return obs
+
+    def sample_actions(self):
+        return self.np_random.uniform(
+            -self.MAX_ACC, self.MAX_ACC, size=(self.num_envs, 2)
+        ).astype(np.float32)
+
+    def make_dataset(self):
+        keys = ['observations', 'actions', 'rewards', 'terminals', 'timeouts']
+        dataset = {key: [] for key in keys}
+
+        N, T = self.num_envs, self.max_steps
+        obs_scratch = np.empty((N, T, 6), dtype=np.float32)
+        act_scratch = np.empty((N, T, 2), dtype=np.float32)
+        rew_scratch = np.empty((N, T), dtype=np.float32)
+        term_scratch = np.empty((N, T), dtype=bool)
+        lengths = np.zeros(N, dtype=np.int64)
+        rows = np.arange(N)
+
+        episode = 0
+        obs = self.reset()
+        while episode < self.num_episodes:
+            action = self.sample_actions()
+            next_obs, reward, done, target_reached = self.step(action)
+
+            obs_scratch[rows, lengths] = obs
+            act_scratch[rows, lengths] = action
+            rew_scratch[rows, lengths] = reward
+            term_scratch[rows, lengths] = done
+            lengths += 1
+
+            # Flush finished episodes and auto-reset the corresponding envs
+            if done.any():
+                for i in np.flatnonzero(done):
+                    length = lengths[i]
+                    if length >= 16 and episode < self.num_episodes:
+                        dataset['observations'].append(obs_scratch[i, :length].copy())
+                        dataset['actions'].append(act_scratch[i, :length].copy())
+                        dataset['rewards'].append(rew_scratch[i, :length].copy())
+                        dataset['terminals'].append(term_scratch[i, :length].copy())
+                        timeouts = np.zeros(length, dtype=bool)
+                        timeouts[-1] = length == T
+                        dataset['timeouts'].append(timeouts)
+
+                        episode += 1
+                        if episode % 2000 == 0:
+                            print("Generated training episode %d of %d" % (episode, self.num_episodes))
+                self._reset_envs(done)
+                lengths[done] = 0
+                next_obs = self._get_obs()
+
+            obs = next_obs
+
+        dataset['observations'] = np.concatenate(dataset['observations'])
+        dataset['actions'] = np.concatenate(dataset['actions'])
+        dataset['rewards'] = np.concatenate(dataset['rewards'])[:, None]
+        dataset['terminals'] = np.concatenate(dataset['terminals'])[:, None]
+        dataset['timeouts'] = np.concatenate(dataset['timeouts'])[:, None]
+
+        print("Dataset shape: ", dataset['observations'].shape)
+
+        return dataset
+
+
 def bound(x, m, M=None):
     """Either have m as scalar, so bound(x,m,M) which returns m <= x <= M *OR*
     have m as length 2 vector, bound(x,m, <IGNORED>) returns m[0] <= x <= m[1].
@@ -5,8 +5,101 @@ from typing import Optional
 from numpy import cos, pi, sin
 from gym import core, spaces
 from gym.error import DependencyNotInstalled
+from scipy.spatial import cKDTree
+from scipy.integrate import solve_ivp
 import math
 import random
+import functools
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:     # numba is optional; the kernels then run as pure Python
+    _HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def _quad_dsdt(s, a1, a2, inv_m, L_inv_i, g, out):
+    # Planar quadrotor dynamics on the raw 6-D state; the thrusts are passed
+    # as scalars instead of being appended to the state, so no augmented
+    # array has to be built per evaluation. The mass/inertia constants come
+    # in as reciprocals so each stage multiplies instead of divides, and the
+    # derivative is written into the caller-owned out buffer.
+    sin_theta = math.sin(s[4])
+    cos_theta = math.cos(s[4])
+    thrust_acc = (a1 + a2) * inv_m
+    out[0] = s[1]
+    out[1] = -thrust_acc * sin_theta
+    out[2] = s[3]
+    out[3] = thrust_acc * cos_theta - g
+    out[4] = s[5]
+    out[5] = (a1 - a2) * L_inv_i
+
+
+@njit(cache=True, fastmath=True)
+def _rk4_step(s, a1, a2, dt, inv_m, L_inv_i, g, out, k1, k2, k3, k4, ytmp):
+    # One classical Runge-Kutta step with the dynamics inlined by the JIT;
+    # all stage buffers are preallocated by the caller, so the integrator
+    # performs zero allocations per step
+    dt2 = dt / 2.0
+    _quad_dsdt(s, a1, a2, inv_m, L_inv_i, g, k1)
+    for i in range(6):
+        ytmp[i] = s[i] + dt2 * k1[i]
+    _quad_dsdt(ytmp, a1, a2, inv_m, L_inv_i, g, k2)
+    for i in range(6):
+        ytmp[i] = s[i] + dt2 * k2[i]
+    _quad_dsdt(ytmp, a1, a2, inv_m, L_inv_i, g, k3)
+    for i in range(6):
+        ytmp[i] = s[i] + dt * k3[i]
+    _quad_dsdt(ytmp, a1, a2, inv_m, L_inv_i, g, k4)
+    dt6 = dt / 6.0
+    for i in range(6):
+        out[i] = s[i] + dt6 * (k1[i] + 2.0 * (k2[i] + k3[i]) + k4[i])
+
+
+@njit(cache=True, fastmath=True)
+def _rk2_step(s, a1, a2, dt, inv_m, L_inv_i, g, out, k1, k2, k3, k4, ytmp):
+    # Midpoint method: two dynamics evaluations instead of four
+    _quad_dsdt(s, a1, a2, inv_m, L_inv_i, g, k1)
+    dt2 = 0.5 * dt
+    for i in range(6):
+        ytmp[i] = s[i] + dt2 * k1[i]
+    _quad_dsdt(ytmp, a1, a2, inv_m, L_inv_i, g, k2)
+    for i in range(6):
+        out[i] = s[i] + dt * k2[i]
+
+
+@njit(cache=True, fastmath=True)
+def _semi_implicit_step(s, a1, a2, dt, inv_m, L_inv_i, g, out, k1, k2, k3, k4, ytmp):
+    # Symplectic Euler: update the velocities first, then advance the
+    # positions with the new velocities; a single dynamics evaluation
+    thrust_acc = (a1 + a2) * inv_m
+    out[1] = s[1] - thrust_acc * math.sin(s[4]) * dt
+    out[3] = s[3] + (thrust_acc * math.cos(s[4]) - g) * dt
+    out[5] = s[5] + (a1 - a2) * L_inv_i * dt
+    out[0] = s[0] + out[1] * dt
+    out[2] = s[2] + out[3] * dt
+    out[4] = s[4] + out[5] * dt
+
+
+_STEP_KERNELS = {'rk4': _rk4_step, 'rk2': _rk2_step, 'semi_implicit': _semi_implicit_step}
+
+
+def _collect_episode_range(args):
+    '''
+        Worker for Quad2DEnv.make_dataset_parallel: builds its own env so no
+        state is shared across processes and collects a slice of the episodes.
+    '''
+    env_kwargs, start, stop = args
+    env_kwargs = dict(env_kwargs, seed=env_kwargs.get('seed', 0) + start)
+    env = Quad2DEnv(**env_kwargs)
+    return env._make_dataset_range(start, stop)
 
 
 class Quad2DEnv(core.Env):
@@ -42,13 +135,38 @@ class Quad2DEnv(core.Env):
                  target=None, max_steps=100, num_episodes=10, epsilon=0.2, reset_target_reached=False, 
                  reset_out_of_bounds=False, bonus_reward=False, initial_state=None, theta_as_sine_cosine=True,
                  n_moving_obstacles_box=0, n_static_obstacles_box=0, n_moving_obstacles_circle=0, n_static_obstacles_circle=0,
-                 reward='squared_distance', test=False, seed=0):
+                 reward='squared_distance', test=False, seed=0, integrator='rk4'):
         self.screen = None
         self.clock = None
         self.isopen = True
+        self._bg = None     # Cached static render background, built on demand
         self.name = "Quad2DEnv"
         self.theta_as_sine_cosine = theta_as_sine_cosine
-        
+
+        # Keep the constructor arguments so worker processes can rebuild the env
+        self._init_kwargs = dict(
+            min_rel_thrust=min_rel_thrust, max_rel_thrust=max_rel_thrust,
+            max_rel_thrust_difference=max_rel_thrust_difference, g=g,
+            target=target, max_steps=max_steps, num_episodes=num_episodes,
+            epsilon=epsilon, reset_target_reached=reset_target_reached,
+            reset_out_of_bounds=reset_out_of_bounds, bonus_reward=bonus_reward,
+            initial_state=initial_state, theta_as_sine_cosine=theta_as_sine_cosine,
+            n_moving_obstacles_box=n_moving_obstacles_box,
+            n_static_obstacles_box=n_static_obstacles_box,
+            n_moving_obstacles_circle=n_moving_obstacles_circle,
+            n_static_obstacles_circle=n_static_obstacles_circle,
+            reward=reward, test=test, seed=seed, integrator=integrator,
+        )
+
+        # rk4 is the default for fidelity; rk2 and semi-implicit (symplectic)
+        # Euler trade accuracy for 2x/4x fewer dynamics evaluations, which is
+        # usually acceptable for dataset generation at dt=0.05
+        if integrator not in _STEP_KERNELS:
+            raise ValueError("integrator must be one of %s" % sorted(_STEP_KERNELS))
+        self.integrator = integrator
+        self._step_fn = _STEP_KERNELS[integrator]
+
+
         # Observation space bounds
         if self.theta_as_sine_cosine:
             obs_high = np.array(
@@ -73,11 +191,17 @@ class Quad2DEnv(core.Env):
         action_high = np.array([self.max_thrust, self.max_thrust], dtype=np.float32)
         self.max_thrust_difference = max_rel_thrust_difference * self.MASS * self.GRAVITY
 
+        # Constant reciprocals so the dynamics multiply instead of divide
+        self._inv_m = 1.0 / self.MASS
+        self._inv_i = 1.0 / self.INERTIA
+        self._L_inv_i = self.LENGTH * self._inv_i
+
         self.state_space = spaces.Box(low=state_low, high=state_high, dtype=np.float32, seed=seed)
         self.observation_space = spaces.Box(low=obs_low, high=obs_high, dtype=np.float32, seed=seed)
         self.action_space = spaces.Box(low=action_low, high=action_high, dtype=np.float32, seed=seed)
         self.state = None
         self.g = g
+        self._obs_buf = np.empty(9 if theta_as_sine_cosine else 8, dtype=np.float32)
 
         self.n_moving_obstacles_box = n_moving_obstacles_box
         self.n_static_obstacles_box = n_static_obstacles_box
@@ -112,6 +236,56 @@ class Quad2DEnv(core.Env):
         self.test = test
         self.seed = seed
 
+        # The feature flags are fixed for the lifetime of the env, so the
+        # per-step hooks and termination checks are selected once here
+        # instead of re-testing the same flags on every step
+        self._step_hooks = []
+        if self.n_moving_obstacles_box > 0 or self.n_moving_obstacles_circle > 0:
+            self._step_hooks.append(self._move_obstacles)
+        self._done_checks = []
+        if self.reset_target_reached:
+            self._done_checks.append(self._check_target_reached)
+        if self.reset_out_of_bounds:
+            self._done_checks.append(
+                self._check_out_of_bounds_test if self.test else self._check_out_of_bounds)
+        if self.n_obstacles > 0:
+            self._done_checks.append(self._check_obstacle_collision)
+
+        # Preallocated integrator buffers: the step kernels write their
+        # stages and result into these instead of allocating per call
+        self._s64 = np.zeros(6)
+        self._ns = np.empty(6)
+        self._k1 = np.empty(6)
+        self._k2 = np.empty(6)
+        self._k3 = np.empty(6)
+        self._k4 = np.empty(6)
+        self._ytmp = np.empty(6)
+        # Per-element state bounds for one vectorized clip after integration;
+        # the angle slot is left open and wrapped instead
+        self._ns_low = np.array([-self.MAX_X, -self.MAX_VEL_X, -self.MAX_Y,
+                                 -self.MAX_VEL_Y, -np.inf, -self.MAX_VEL_ANG])
+        self._ns_high = -self._ns_low
+
+        # Trigger the JIT compile once so the first step is not slowed down
+        self._step_fn(self._s64, self.min_thrust, self.min_thrust, self.dt,
+                      self._inv_m, self._L_inv_i, self.g, self._ns,
+                      self._k1, self._k2, self._k3, self._k4, self._ytmp)
+
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, value):
+        # Cache the ndarray form alongside the tuple so the observation
+        # assembly can copy both coordinates with one vectorized assignment
+        if value is None:
+            self._target = None
+            self._target_np = None
+        else:
+            self._target = (float(value[0]), float(value[1]))
+            self._target_np = np.asarray(self._target, dtype=np.float32)
+
     def reset(
         self,
         *,
@@ -123,10 +297,11 @@ class Quad2DEnv(core.Env):
 
         if self.n_obstacles > 0:
             self._generate_obstacles()
+            self._bg = None     # Static obstacles changed, rebuild the background
 
         is_valid = False
         if not self.random_target:
-            self.state = self.initial_state
+            self.state = np.asarray(self.initial_state, dtype=np.float32)
         else:
             while not is_valid:
                 self.state = self.state_space.sample()
@@ -142,15 +317,16 @@ class Quad2DEnv(core.Env):
                 is_valid = self._check_target(self.target)
         self.target_reached = False
 
+        # Return a copy here since the initial observation is typically retained
         if not return_info:
-            return self._get_ob()
+            return self._get_ob().copy()
         else:
-            return self._get_ob(), {}
+            return self._get_ob().copy(), {}
 
     def _sample_target(self):
-        # Random x/y target position in [-self.MAX_X/Y, self.MAX_X/Y]
-        x = 2 * self.MAX_X * (self.np_random.rand() - 0.5)
-        y = 2 * self.MAX_Y * (self.np_random.rand() - 0.5)
+        # Random x/y target position in [-self.MAX_X/Y, self.MAX_X/Y],
+        # drawn with one Generator call instead of two deprecated rand()s
+        x, y = self.np_random.uniform([-self.MAX_X, -self.MAX_Y], [self.MAX_X, self.MAX_Y])
 
         return (x, y)
 
@@ -159,51 +335,61 @@ class Quad2DEnv(core.Env):
 
         # Check if the target is at least epsilon away from the initial position
         if self.state is not None:
-            p = self._get_coordinates(self.state)
-            distance = np.linalg.norm(np.array(p) - np.array(target))
+            # math.hypot on scalars avoids building arrays for a 2-element norm
+            distance = math.hypot(self.state[0] - target[0], self.state[2] - target[1])
             if distance <= self.epsilon:
                 return False
             
-        if self.n_static_obstacles_box > 0:
-            for i in np.arange(self.n_moving_obstacles_box, self.n_obstacles_box):          # Check that the target is not inside any obstacle
-                obstacle = self.obstacles[i]
-                if target[0] >= obstacle['x'] - obstacle['d'] / 2 - obstacle_distance and \
-                    target[0] <= obstacle['x'] + obstacle['d'] / 2 + obstacle_distance and \
-                    target[1] >= obstacle['y'] - obstacle['d'] / 2 - obstacle_distance and \
-                    target[1] <= obstacle['y'] + obstacle['d'] / 2 + obstacle_distance:
-                    return False
-                
-        if self.n_static_obstacles_circle > 0:
-            for i in np.arange(self.n_obstacles_box + self.n_moving_obstacles_circle, self.n_obstacles):      # Check that the target is not inside any obstacle
-                obstacle = self.obstacles[i]
-                distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(target))
-                if distance <= obstacle['r'] + obstacle_distance:
+        if self.n_static_obstacles_box > 0 or self.n_static_obstacles_circle > 0:
+            # Check that the target is not inside any static obstacle; the k-d
+            # tree narrows the precise test down to nearby candidates
+            idx = self._obstacles_near(target[0], target[1], obstacle_distance)
+            if len(idx) > 0:
+                moving = (idx < self.n_moving_obstacles_box) | \
+                    ((idx >= self.n_obstacles_box) &
+                     (idx < self.n_obstacles_box + self.n_moving_obstacles_circle))
+                idx = idx[~moving]
+            if len(idx) > 0:
+                dx = self.obs_x[idx] - target[0]
+                dy = self.obs_y[idx] - target[1]
+                size = self.obs_size[idx]
+                is_box = self.obs_is_box[idx]
+                box_hit = is_box & \
+                    (np.abs(dx) <= size / 2 + obstacle_distance) & \
+                    (np.abs(dy) <= size / 2 + obstacle_distance)
+                # Compare squared distances so no sqrt is taken in the guard
+                circle_hit = ~is_box & \
+                    (dx * dx + dy * dy <= (size + obstacle_distance) ** 2)
+                if box_hit.any() or circle_hit.any():
                     return False
-                
+
         return True
 
     def _check_initial_pos(self, state):
         obstacle_distance = 1.0
 
-        p = self._get_coordinates(state)
+        # Work on the scalar coordinates directly instead of going through
+        # the list that _get_coordinates builds
+        x, y = state[0], state[2]
         if self.target is not None:
-            distance = np.linalg.norm(np.array(p) - np.array(self.target))
+            distance = math.hypot(x - self.target[0], y - self.target[1])
             if distance <= self.epsilon:
                 return False
-            
+
         if self.n_obstacles > 0:
-            for i in range(self.n_obstacles):
-                obstacle = self.obstacles[i]
-                if 'd' in obstacle:
-                    if p[0] >= obstacle['x'] - obstacle['d'] / 2 - obstacle_distance and \
-                        p[0] <= obstacle['x'] + obstacle['d'] / 2 + obstacle_distance and \
-                        p[1] >= obstacle['y'] - obstacle['d'] / 2 - obstacle_distance and \
-                        p[1] <= obstacle['y'] + obstacle['d'] / 2 + obstacle_distance:
-                        return False
-                if 'r' in obstacle:
-                    distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(p))
-                    if distance <= obstacle['r'] + obstacle_distance:
-                        return False
+            idx = self._obstacles_near(x, y, obstacle_distance)
+            if len(idx) > 0:
+                dx = self.obs_x[idx] - x
+                dy = self.obs_y[idx] - y
+                size = self.obs_size[idx]
+                is_box = self.obs_is_box[idx]
+                box_hit = is_box & \
+                    (np.abs(dx) <= size / 2 + obstacle_distance) & \
+                    (np.abs(dy) <= size / 2 + obstacle_distance)
+                circle_hit = ~is_box & \
+                    (dx * dx + dy * dy <= (size + obstacle_distance) ** 2)
+                if box_hit.any() or circle_hit.any():
+                    return False
         return True
     
     def _check_initial_vel(self, state):
@@ -223,74 +409,68 @@ class Quad2DEnv(core.Env):
 
     def _generate_obstacles(self):
         '''
-            Generate the obstacles for the environment.
+            Generate the obstacles for the environment, stored as structure-of-
+            arrays (obs_x/obs_y/obs_vx/obs_vy/obs_size plus an obs_is_box mask)
+            so the per-step collision checks run as vectorized numpy ops
+            instead of dict lookups per obstacle.
             Ordering: [moving_boxes, static_boxes, moving_circles, static_circles]
-        '''        
-        
+        '''
+
         d_min, d_max, r_min, r_max = 0.1, 0.5, 0.1, 0.5
         dist_min = 2.0
-        self.obstacles = []
+
+        n = self.n_obstacles
+        self.obs_x = np.empty(n)
+        self.obs_y = np.empty(n)
+        self.obs_vx = np.zeros(n)
+        self.obs_vy = np.zeros(n)
+        self.obs_size = np.empty(n)     # edge length d for boxes, radius r for circles
+        self.obs_is_box = np.arange(n) < self.n_obstacles_box
 
         counter = 0
-        while counter < self.n_moving_obstacles_box:
-            d = d_min + self.np_random.rand() * (d_max - d_min)
-            x = (2 * self.MAX_X - d) * (self.np_random.rand() - 0.5)
-            y = (2 * self.MAX_Y - d) * (self.np_random.rand() - 0.5)
-            is_valid = True
-            for i in range(counter):
-                obstacle = self.obstacles[i]
-                if np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array([x, y])) < dist_min:
-                    is_valid = False
-                    break
-            if is_valid:
-                vx = self.MAX_VEL_X * (self.np_random.rand() - 0.5)
-                vy = self.MAX_VEL_Y * (self.np_random.rand() - 0.5)
-                self.obstacles.append({'x': x, 'y': y, 'vx': vx, 'vy': vy, 'd': d})
-                counter += 1
-
-        while counter < self.n_moving_obstacles_box + self.n_static_obstacles_box:
-            d = d_min + self.np_random.rand() * (d_max - d_min)
-            x = (2 * self.MAX_X - d) * (self.np_random.rand() - 0.5)
-            y = (2 * self.MAX_Y - d) * (self.np_random.rand() - 0.5)
-            is_valid = True
-            for i in range(counter):
-                obstacle = self.obstacles[i]
-                if np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array([x, y])) < dist_min:
-                    is_valid = False
-                    break
-            if is_valid:
-                self.obstacles.append({'x': x, 'y': y, 'vx': 0, 'vy': 0, 'd': d})
-                counter += 1
-
-        while counter < self.n_moving_obstacles_box + self.n_static_obstacles_box + self.n_moving_obstacles_circle:
-            r = r_min + self.np_random.rand() * (r_max - r_min)
-            x = (2 * self.MAX_X - r) * (self.np_random.rand() - 0.5)
-            y = (2 * self.MAX_Y - r) * (self.np_random.rand() - 0.5)
-            is_valid = True
-            for i in range(counter):
-                obstacle = self.obstacles[i]
-                if np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array([x, y])) < dist_min:
-                    is_valid = False
-                    break
-            if is_valid:
-                vx = self.MAX_VEL_X * (self.np_random.rand() - 0.5)
-                vy = self.MAX_VEL_Y * (self.np_random.rand() - 0.5)
-                self.obstacles.append({'x': x, 'y': y, 'vx': vx, 'vy': vy, 'r': r})
-                counter += 1
-
-        while counter < self.n_moving_obstacles_box + self.n_static_obstacles_box + self.n_moving_obstacles_circle + self.n_static_obstacles_circle:
-            r = r_min + self.np_random.rand() * (r_max - r_min)
-            x = (2 * self.MAX_X - r) * (self.np_random.rand() - 0.5)
-            y = (2 * self.MAX_Y - r) * (self.np_random.rand() - 0.5)
-            is_valid = True
-            for i in range(counter):
-                obstacle = self.obstacles[i]
-                if np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array([x, y])) < dist_min:
-                    is_valid = False
-                    break
-            if is_valid:
-                self.obstacles.append({'x': x, 'y': y, 'vx': 0, 'vy': 0, 'r': r})
-                counter += 1
+        while counter < n:
+            is_box = counter < self.n_obstacles_box
+            moving = counter < self.n_moving_obstacles_box or \
+                self.n_obstacles_box <= counter < self.n_obstacles_box + self.n_moving_obstacles_circle
+            # One batched Generator draw per attempt instead of up to five
+            # scalar rand() calls
+            u = self.np_random.random(5)
+            if is_box:
+                size = d_min + u[0] * (d_max - d_min)
+            else:
+                size = r_min + u[0] * (r_max - r_min)
+            x = (2 * self.MAX_X - size) * (u[1] - 0.5)
+            y = (2 * self.MAX_Y - size) * (u[2] - 0.5)
+            if counter > 0 and \
+                    np.min(np.hypot(self.obs_x[:counter] - x, self.obs_y[:counter] - y)) < dist_min:
+                continue
+            self.obs_x[counter] = x
+            self.obs_y[counter] = y
+            if moving:
+                self.obs_vx[counter] = self.MAX_VEL_X * (u[3] - 0.5)
+                self.obs_vy[counter] = self.MAX_VEL_Y * (u[4] - 0.5)
+            self.obs_size[counter] = size
+            counter += 1
+
+        # Spatial index over the obstacle centers for the reset-time checks
+        # (_check_target/_check_initial_pos). The per-step collision test in
+        # _is_done keeps the vectorized scan, since moving obstacles would
+        # invalidate the tree after the first step.
+        self._obs_tree = cKDTree(np.column_stack((self.obs_x, self.obs_y)))
+        self._max_obs_extent = float(np.max(
+            np.where(self.obs_is_box, self.obs_size * math.sqrt(2) / 2, self.obs_size)
+        ))
+        # Half-extent per obstacle (half-width for boxes, radius for circles);
+        # the sizes never change, so compute it once here instead of per step
+        self._obs_half = np.where(self.obs_is_box, self.obs_size / 2, self.obs_size)
+
+    def _obstacles_near(self, x, y, obstacle_distance):
+        # Candidate obstacle indices whose hit region could contain (x, y);
+        # sqrt(2) padding covers the corner distance of box obstacles
+        idx = self._obs_tree.query_ball_point(
+            [x, y], r=self._max_obs_extent + math.sqrt(2) * obstacle_distance
+        )
+        return np.asarray(idx, dtype=np.intp)
 
     def step(self, a):
         s = self.state
@@ -306,48 +486,30 @@ class Quad2DEnv(core.Env):
                 -self.torque_noise_max, self.torque_noise_max
             )
 
-        # Now, augment the state with our force action so it can be passed to _dsdt
-        s_augmented = np.append(s, thrust)
-
-        ns = rk4(self._dsdt, s_augmented, [0, self.dt])
-
-        ns[0] = bound(ns[0], -self.MAX_X, self.MAX_X)
-        ns[1] = bound(ns[1], -self.MAX_VEL_X, self.MAX_VEL_X)
-        ns[2] = bound(ns[2], -self.MAX_Y, self.MAX_Y)
-        ns[3] = bound(ns[3], -self.MAX_VEL_Y, self.MAX_VEL_Y)
+        # The integration step runs in a single jitted kernel with the
+        # dynamics inlined; the thrusts are handed over as scalars and all
+        # state and stage buffers are reused across steps
+        self._s64[:] = s
+        self._step_fn(self._s64, float(thrust[0]), float(thrust[1]), self.dt,
+                      self._inv_m, self._L_inv_i, self.g, self._ns,
+                      self._k1, self._k2, self._k3, self._k4, self._ytmp)
+        ns = self._ns
+
+        # One vectorized clip over the whole state (the angle slot is open
+        # at +-inf), then wrap the angle separately
+        np.clip(ns, self._ns_low, self._ns_high, out=ns)
         ns[4] = wrap(ns[4], -self.MAX_ANG, self.MAX_ANG)
-        ns[5] = bound(ns[5], -self.MAX_VEL_ANG, self.MAX_VEL_ANG)
 
         self.prev_state = self.state
-        self.state = ns
-
-        # Move box-shaped obstacles
-        if self.n_moving_obstacles_box > 0:
-            for i in range(self.n_moving_obstacles_box):
-                obstacle = self.obstacles[i]
-                possible_new_x = obstacle['x'] + obstacle['vx'] * self.dt
-                possible_new_y = obstacle['y'] + obstacle['vy'] * self.dt
-                if possible_new_x <= -self.MAX_X + obstacle['d'] / 2 or possible_new_x >= self.MAX_X - obstacle['d'] / 2:
-                    obstacle['vx'] *= -1
-                if possible_new_y <= -self.MAX_Y + obstacle['d'] / 2 or possible_new_y >= self.MAX_Y - obstacle['d'] / 2:
-                    obstacle['vy'] *= -1
-
-                obstacle['x'] += obstacle['vx'] * self.dt
-                obstacle['y'] += obstacle['vy'] * self.dt
-
-        # Move circular obstacles
-        if self.n_moving_obstacles_circle > 0:
-            for i in range(self.n_moving_obstacles_circle):
-                obstacle = self.obstacles[self.n_obstacles_box + i]
-                possible_new_x = obstacle['x'] + obstacle['vx'] * self.dt
-                possible_new_y = obstacle['y'] + obstacle['vy'] * self.dt
-                if possible_new_x <= -self.MAX_X + obstacle['r'] or possible_new_x >= self.MAX_X - obstacle['r']:
-                    obstacle['vx'] *= -1
-                if possible_new_y <= -self.MAX_Y + obstacle['r'] or possible_new_y >= self.MAX_Y - obstacle['r']:
-                    obstacle['vy'] *= -1
-
-                obstacle['x'] += obstacle['vx'] * self.dt
-                obstacle['y'] += obstacle['vy'] * self.dt
+        # The state is kept in float32 end-to-end (matching the observation
+        # and state spaces); the integrator works in float64 internally and
+        # the result is cast once on store
+        self.state = ns.astype(np.float32)
+
+        # Only the hooks for features enabled at construction are installed,
+        # so a plain env pays nothing here
+        for hook in self._step_hooks:
+            hook()
 
         done = self._is_done()
         reward = self._get_reward()
@@ -358,147 +520,211 @@ class Quad2DEnv(core.Env):
     def sample_action(self):
         a = self.action_space.sample()
         if self.max_thrust_difference > 0:
-            a[1] = a[0] + self.np_random.uniform(-self.max_thrust_difference, self.max_thrust_difference)
-            while a[1] < self.min_thrust or a[1] > self.max_thrust:
-                a[1] = a[0] + self.np_random.uniform(-self.max_thrust_difference, self.max_thrust_difference)
+            # Clamp instead of resampling; this bounds the call at one draw
+            a[1] = np.clip(
+                a[0] + self.np_random.uniform(-self.max_thrust_difference, self.max_thrust_difference),
+                self.min_thrust, self.max_thrust
+            )
         return a
     
     def inverse_dynamics(self, s_next):
-        # Get parameters
-        m = self.MASS
-        i = self.INERTIA
-        g = self.g
-
-        s = self.state
+        a1, a2 = self.inverse_dynamics_batch(
+            np.asarray(self.state)[None], np.asarray(s_next)[None]
+        )[0]
+        return (a1, a2)
 
-        # Unpack the state and action
-        dx, dy, theta, dtheta = s[1], s[3], s[4], s[5]
-        dx_next, dy_next, theta_next, dtheta_next = s_next[1], s_next[3], s_next[4], s_next[5]
+    def inverse_dynamics_batch(self, states, next_states):
+        '''
+            Vectorized inverse dynamics: takes (T, 6) arrays of states and
+            successor states and returns the (T, 2) thrusts that realize the
+            transitions, so a whole planning horizon is solved in one call.
+        '''
+        states = np.asarray(states)
+        next_states = np.asarray(next_states)
 
         # Get accelerations
-        ddx = (dx_next - dx) / self.dt
-        ddy = (dy_next - dy) / self.dt
-        ddtheta = (dtheta_next - dtheta) / self.dt
+        ddx = (next_states[:, 1] - states[:, 1]) / self.dt
+        ddy = (next_states[:, 3] - states[:, 3]) / self.dt
+        ddtheta = (next_states[:, 5] - states[:, 5]) / self.dt
 
-        # Thrust sum
-        sum = m * np.sqrt(ddx**2 + (ddy + g)**2)
-        
-        # Thrust difference
-        diff = i * ddtheta / self.LENGTH
+        # Thrust sum and difference
+        thrust_sum = self.MASS * np.sqrt(ddx ** 2 + (ddy + self.g) ** 2)
+        thrust_diff = self.INERTIA * ddtheta / self.LENGTH
 
         # Solve for the forces
-        a1 = (sum + diff) / 2
-        a2 = (sum - diff) / 2
-
-        return (a1, a2)
+        return np.stack(((thrust_sum + thrust_diff) / 2, (thrust_sum - thrust_diff) / 2), axis=1)
 
     def get_obstacles(self):
-        return self.obstacles if self.n_obstacles > 0 else None
-    
+        if self.n_obstacles == 0:
+            return None
+        # Assemble the legacy list-of-dicts view on demand
+        obstacles = []
+        for i in range(self.n_obstacles):
+            obstacle = {'x': self.obs_x[i], 'y': self.obs_y[i],
+                        'vx': self.obs_vx[i], 'vy': self.obs_vy[i]}
+            obstacle['d' if self.obs_is_box[i] else 'r'] = self.obs_size[i]
+            obstacles.append(obstacle)
+        return obstacles
+
+    @property
+    def obstacles(self):
+        # Read-only dict view for legacy callers; the authoritative storage
+        # is the structure-of-arrays filled by _generate_obstacles
+        return self.get_obstacles()
+
+
+    def predict_obstacles_array(self, horizon):
+        '''
+            Predict the future positions of the obstacles for the given horizon
+            as a single (horizon, n_obstacles, 4) array of [x, y, vx, vy].
+            The sizes do not change over time and stay in obs_size/obs_is_box.
+        '''
+
+        if self.n_obstacles is None or self.n_obstacles == 0:
+            return None
+
+        traj = np.empty((horizon, self.n_obstacles, 4))
+        traj[0, :, 0] = self.obs_x
+        traj[0, :, 1] = self.obs_y
+        traj[0, :, 2] = self.obs_vx
+        traj[0, :, 3] = self.obs_vy
+        half = self._obs_half
+        for i in range(1, horizon):
+            # Advance all obstacles at once; only the horizon loop stays in Python
+            prev = traj[i - 1]
+            possible_x = prev[:, 0] + prev[:, 2] * self.dt
+            possible_y = prev[:, 1] + prev[:, 3] * self.dt
+            bounce_x = (possible_x <= -self.MAX_X + half) | (possible_x >= self.MAX_X - half)
+            bounce_y = (possible_y <= -self.MAX_Y + half) | (possible_y >= self.MAX_Y - half)
+            traj[i, :, 2] = np.where(bounce_x, -prev[:, 2], prev[:, 2])
+            traj[i, :, 3] = np.where(bounce_y, -prev[:, 3], prev[:, 3])
+            traj[i, :, 0] = prev[:, 0] + traj[i, :, 2] * self.dt
+            traj[i, :, 1] = prev[:, 1] + traj[i, :, 3] * self.dt
+        return traj
+
     def predict_obstacles(self, horizon):
         '''
             Predict the future positions of the moving obstacles for the given horizon.
             return {0: [{'x': x, 'y': y, 'vx': vx, 'vy': vy, 'd': d}, ...], 1: [...], ..., horizon: [...]}
+            Thin dict view over predict_obstacles_array for legacy callers.
         '''
 
-        if self.n_obstacles is None or self.n_obstacles == 0:
+        traj = self.predict_obstacles_array(horizon)
+        if traj is None:
             return None
 
         predictions = {}
         for i in range(horizon):
             predictions[i] = []
-            for j in range(self.n_obstacles_box):       
-                if i == 0:
-                    predictions[i].append({'x': self.obstacles[j]['x'], 'y': self.obstacles[j]['y'], 'vx': self.obstacles[j]['vx'], 'vy': self.obstacles[j]['vy'], 'd': self.obstacles[j]['d']})
-                    continue
-                
-                x = predictions[i - 1][j]['x']
-                y = predictions[i - 1][j]['y']
-
-                vx = predictions[i - 1][j]['vx']
-                vy = predictions[i - 1][j]['vy']
-                
-                possible_x = x + vx * self.dt
-                possible_y = y + vy * self.dt
-
-                if possible_x <= -self.MAX_X + self.obstacles[j]['d'] / 2 or possible_x >= self.MAX_X - self.obstacles[j]['d'] / 2:
-                    vx *= -1
-                if possible_y <= -self.MAX_Y + self.obstacles[j]['d'] / 2 or possible_y >= self.MAX_Y - self.obstacles[j]['d'] / 2:
-                    vy *= -1
-
-                predictions[i].append({'x': x + vx * self.dt, 'y': y + vy * self.dt, 'vx': vx, 'vy': vy, 'd': self.obstacles[j]['d']})
-
-            for j in range(self.n_obstacles_box, self.n_obstacles):
-                if i == 0:
-                    predictions[i].append({'x': self.obstacles[j]['x'], 'y': self.obstacles[j]['y'], 'vx': self.obstacles[j]['vx'], 'vy': self.obstacles[j]['vy'], 'r': self.obstacles[j]['r']})
-                    continue
-                
-                x = predictions[i - 1][j]['x']
-                y = predictions[i - 1][j]['y']
-
-                vx = predictions[i - 1][j]['vx']
-                vy = predictions[i - 1][j]['vy']
-                
-                possible_x = x + vx * self.dt
-                possible_y = y + vy * self.dt
-
-                if possible_x <= -self.MAX_X + self.obstacles[j]['r'] or possible_x >= self.MAX_X - self.obstacles[j]['r']:
-                    vx *= -1
-                if possible_y <= -self.MAX_Y + self.obstacles[j]['r'] or possible_y >= self.MAX_Y - self.obstacles[j]['r']:
-                    vy *= -1
-
-                predictions[i].append({'x': x + vx * self.dt, 'y': y + vy * self.dt, 'vx': vx, 'vy': vy, 'r': self.obstacles[j]['r']})
+            for j in range(self.n_obstacles):
+                obstacle = {'x': traj[i, j, 0], 'y': traj[i, j, 1],
+                            'vx': traj[i, j, 2], 'vy': traj[i, j, 3]}
+                obstacle['d' if self.obs_is_box[j] else 'r'] = self.obs_size[j]
+                predictions[i].append(obstacle)
 
         return predictions
     
     def make_dataset(self):
-        dataset = {}
-        keys = ['observations', 'actions', 'rewards', 'terminals', 'timeouts']
+        dataset = self._make_dataset_range(0, self.num_episodes)
+
+        print("Dataset shape: ", dataset['observations'].shape)
+        # print("Observation limits: ", np.min(dataset['observations'], axis=0), np.max(dataset['observations'], axis=0))
+        # print("Action limits: ", np.min(dataset['actions'], axis=0), np.max(dataset['actions'], axis=0))
+
+        return dataset
+
+    def make_dataset_parallel(self, num_workers=None):
+        '''
+            Generate the dataset with the episodes split across worker processes.
+            Episodes are independent, so this scales close to linearly with the
+            number of cores.
+        '''
+        import multiprocessing as mp
+
+        if num_workers is None:
+            num_workers = mp.cpu_count()
+        num_workers = min(num_workers, self.num_episodes)
+
+        bounds = np.linspace(0, self.num_episodes, num_workers + 1, dtype=int)
+        jobs = [(self._init_kwargs, int(bounds[i]), int(bounds[i + 1]))
+                for i in range(num_workers) if bounds[i] < bounds[i + 1]]
+
+        with mp.Pool(len(jobs)) as pool:
+            results = pool.map(_collect_episode_range, jobs)
+
+        dataset = {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+        print("Dataset shape: ", dataset['observations'].shape)
+
+        return dataset
+
+    def _make_dataset_range(self, start, stop):
+        # Preallocate the observation/action arrays once and fill rows through a
+        # write cursor instead of growing Python lists and converting at the end
+        obs_dim = self._obs_buf.shape[0]
+        capacity = (stop - start) * self.max_steps
+        obs_buf = np.empty((capacity, obs_dim), dtype=np.float32)
+        act_buf = np.empty((capacity, 2), dtype=np.float32)
+        rewards = []
+        terminals = []
+        timeouts = []
+        k = 0
+
+        # Per-episode scratch buffers, overwritten each episode; accepted
+        # episodes are copied out, so the inner loop does no list appends
+        rew_scratch = np.empty(self.max_steps, dtype=np.float32)
+        term_scratch = np.empty(self.max_steps, dtype=bool)
+
+        episode = start
+        while episode < stop:
 
-        dataset = {key: [] for key in keys}
-        
-        episode = 0
-        while episode < self.num_episodes:
-          
             state = self.reset(seed=episode)
 
-            dataset_episode = {key: [] for key in keys}
+            k0 = k
+            length = 0
 
             for step in range(self.max_steps):
                 action = self.sample_action()
+                # Store the row before stepping: state may alias the shared
+                # observation buffer that step() overwrites in place
+                obs_buf[k] = state
+                act_buf[k] = action
                 next_state, reward, done, target_reached = self.step(action)
-                
-                dataset_episode['observations'].append(state)
-                dataset_episode['actions'].append(action)
-                dataset_episode['rewards'].append([reward])
-                dataset_episode['terminals'].append([done])
-                dataset_episode['timeouts'].append([0 if step < self.max_steps - 1 else 1])
+
+                k += 1
+                rew_scratch[step] = reward
+                term_scratch[step] = done
+                length = step + 1
 
                 state = next_state
                 if done:
                     break
-            
-            if len(dataset_episode['rewards']) < 16:
+
+            if length < 16:
+                k = k0      # Rewind the cursor to discard the too-short episode
                 continue
-            
+
             episode += 1
 
             if episode % 2000 == 0:
                 print("Generated training episode %d of %d" % (episode, self.num_episodes))
 
-            for key in keys:
-                dataset[key].extend(dataset_episode[key])
+            rewards.append(rew_scratch[:length].copy())
+            terminals.append(term_scratch[:length].copy())
+            # Only the final step of a full-length episode is a timeout
+            episode_timeouts = np.zeros(length, dtype=bool)
+            episode_timeouts[-1] = length == self.max_steps
+            timeouts.append(episode_timeouts)
 
-        # Convert lists to numpy arrays
-        for key in dataset.keys():
-            dataset[key] = np.array(dataset[key])
+        return {
+            'observations': obs_buf[:k],
+            'actions': act_buf[:k],
+            'rewards': np.concatenate(rewards).reshape(-1, 1),
+            'terminals': np.concatenate(terminals).reshape(-1, 1),
+            'timeouts': np.concatenate(timeouts).reshape(-1, 1),
+        }
 
-        print("Dataset shape: ", dataset['observations'].shape)
-        # print("Observation limits: ", np.min(dataset['observations'], axis=0), np.max(dataset['observations'], axis=0))
-        # print("Action limits: ", np.min(dataset['actions'], axis=0), np.max(dataset['actions'], axis=0))
 
-        return dataset
-    
     def get_dataset(self):
         path = 'training_data/quad2d_dataset.pkl'
         # Check if there is a file at the specified path
@@ -515,89 +741,98 @@ class Quad2DEnv(core.Env):
     def _get_ob(self):
         s = self.state
         assert s is not None, "Call reset before using AcrobotEnv object."
+        # Reuse a preallocated buffer instead of allocating a fresh array per
+        # step; callers that retain observations across steps have to copy.
+        # math.sin/cos on the scalar angle avoid the numpy ufunc dispatch.
+        b = self._obs_buf
+        b[0] = s[0]
+        b[1] = s[1]
+        b[2] = s[2]
+        b[3] = s[3]
         if self.theta_as_sine_cosine:
-            return np.array(
-                [s[0], s[1], s[2], s[3], sin(s[4]), cos(s[4]), s[5], self.target[0], self.target[1]], dtype=np.float32
-            )
+            b[4] = math.sin(s[4])
+            b[5] = math.cos(s[4])
+            b[6] = s[5]
         else:
-            return np.array(
-                [s[0], s[1], s[2], s[3], s[4], s[5], self.target[0], self.target[1]], dtype=np.float32
-            )
+            b[4] = s[4]
+            b[5] = s[5]
+        b[-2:] = self._target_np
+        return b
 
     def _get_coordinates(self, state):
         p = [state[0], state[2]]
         return p
 
     def _get_distance_to_target(self):
-        p = self._get_coordinates(self.state)
-        distance = np.linalg.norm(np.array(p) - np.array(self.target))
-        return distance
+        return math.hypot(self.state[0] - self.target[0], self.state[2] - self.target[1])
 
     def _get_reward(self):
         distance = self._get_distance_to_target()
         reward = -distance ** 2
-        if distance <= self.epsilon:
-            if self.bonus_reward:
-                reward += 1000.0
+        if self.bonus_reward and distance <= self.epsilon:
+            reward += 1000.0
         return reward
 
-    def _is_done(self):   
-        if self.reset_target_reached:
-            distance = self._get_distance_to_target()
-            if distance <= self.epsilon:
-                self.target_reached = True
-                return True
-        
-        if self.reset_out_of_bounds:
-            if not self.test:
-                if self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
-                    self.state[1] <= -self.MAX_VEL_X + 1e-4 or self.state[1] >= self.MAX_VEL_X - 1e-4 or \
-                    self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4 or \
-                    self.state[3] <= -self.MAX_VEL_Y + 1e-4 or self.state[3] >= self.MAX_VEL_Y - 1e-4 or \
-                    self.state[5] <= -self.MAX_VEL_ANG + 1e-4 or self.state[5] >= self.MAX_VEL_ANG - 1e-4:
-                    return True
-            else:
-                if self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
-                    self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4:
-                    return True
-
-            
-        if self.n_obstacles > 0:
-            for i in range(self.n_obstacles):
-                obstacle = self.obstacles[i]
-                if 'd' in obstacle:
-                    if self.state[0] >= obstacle['x'] - obstacle['d'] / 2 and \
-                        self.state[0] <= obstacle['x'] + obstacle['d'] / 2 and \
-                        self.state[2] >= obstacle['y'] - obstacle['d'] / 2 and \
-                        self.state[2] <= obstacle['y'] + obstacle['d'] / 2:
-                        self.target_reached = -1
-                        return True
-                if 'r' in obstacle:
-                    distance = np.linalg.norm(np.array([obstacle['x'], obstacle['y']]) - np.array(self._get_coordinates(self.state)))
-                    if distance <= obstacle['r']:
-                        self.target_reached = -1
-                        return True
+    def _move_obstacles(self):
+        # Move the obstacles, bouncing off the walls; one vectorized update
+        # covers boxes and circles (static obstacles have zero velocity)
+        half = self._obs_half
+        possible_new_x = self.obs_x + self.obs_vx * self.dt
+        possible_new_y = self.obs_y + self.obs_vy * self.dt
+        bounce_x = (possible_new_x <= -self.MAX_X + half) | (possible_new_x >= self.MAX_X - half)
+        bounce_y = (possible_new_y <= -self.MAX_Y + half) | (possible_new_y >= self.MAX_Y - half)
+        self.obs_vx[bounce_x] *= -1
+        self.obs_vy[bounce_y] *= -1
+        self.obs_x += self.obs_vx * self.dt
+        self.obs_y += self.obs_vy * self.dt
+
+    def _check_target_reached(self):
+        if self._get_distance_to_target() <= self.epsilon:
+            self.target_reached = True
+            return True
+        return False
 
-        if self.timestep == self.max_steps - 1:
+    def _check_out_of_bounds(self):
+        return self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
+            self.state[1] <= -self.MAX_VEL_X + 1e-4 or self.state[1] >= self.MAX_VEL_X - 1e-4 or \
+            self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4 or \
+            self.state[3] <= -self.MAX_VEL_Y + 1e-4 or self.state[3] >= self.MAX_VEL_Y - 1e-4 or \
+            self.state[5] <= -self.MAX_VEL_ANG + 1e-4 or self.state[5] >= self.MAX_VEL_ANG - 1e-4
+
+    def _check_out_of_bounds_test(self):
+        # In test mode only the positions are bounded
+        return self.state[0] <= -self.MAX_X + 1e-4 or self.state[0] >= self.MAX_X - 1e-4 or \
+            self.state[2] <= -self.MAX_Y + 1e-4 or self.state[2] >= self.MAX_Y - 1e-4
+
+    def _check_obstacle_collision(self):
+        # One vectorized collision test over all obstacles
+        dx = self.obs_x - self.state[0]
+        dy = self.obs_y - self.state[2]
+        box_hit = self.obs_is_box & (np.abs(dx) <= self.obs_size / 2) & (np.abs(dy) <= self.obs_size / 2)
+        circle_hit = ~self.obs_is_box & (dx * dx + dy * dy <= self.obs_size ** 2)
+        if box_hit.any() or circle_hit.any():
+            self.target_reached = -1
             return True
-        
         return False
 
-    def _dsdt(self, s_augmented):
-        # Get parameters
-        m = self.MASS
-        i = self.INERTIA       
-        g = self.g
+    def _is_done(self):
+        # The list of checks is fixed at construction from the feature flags
+        for check in self._done_checks:
+            if check():
+                return True
+        return self.timestep == self.max_steps - 1
 
+    def _dsdt(self, s_augmented):
         # Unpack the state and action
         a1 = s_augmented[-2]
         a2 = s_augmented[-1]
         s = s_augmented[:-1]
         _, dx, _, dy, theta, dtheta = s[0], s[1], s[2], s[3], s[4], s[5]
 
-        ddx = - 1/m * (a1 + a2) * sin(theta)
-        ddy = 1/m * (a1 + a2) * cos(theta) - g
-        ddtheta = 1/i * (self.LENGTH * (a1 - a2))
+        thrust_acc = (a1 + a2) * self._inv_m
+        ddx = -thrust_acc * sin(theta)
+        ddy = thrust_acc * cos(theta) - self.g
+        ddtheta = (a1 - a2) * self._L_inv_i
 
         return (dx, ddx, dy, ddy, dtheta, ddtheta, 0.0, 0.0)
 
@@ -618,8 +853,6 @@ class Quad2DEnv(core.Env):
         if self.clock is None:
             self.clock = pygame.time.Clock()
 
-        self.surf = pygame.Surface((self.SCREEN_DIM, self.SCREEN_DIM))
-        self.surf.fill((255, 255, 255))
         s = self.state
 
         bound = self.MAX_X + 0.2
@@ -629,42 +862,69 @@ class Quad2DEnv(core.Env):
         if s is None:
             return None
 
+        # All drawing happens directly in screen (flipped) coordinates:
+        # flip_y converts a surface y once at compute time, which replaces
+        # the full-buffer pygame.transform.flip copy at the end of the frame
+        def flip_y(y):
+            return self.SCREEN_DIM - y
+
+        # The static parts (white fill plus non-moving obstacles) are rendered
+        # once and reused as the frame background
+        if self._bg is None:
+            self._bg = pygame.Surface((self.SCREEN_DIM, self.SCREEN_DIM))
+            self._bg.fill((255, 255, 255))
+            if self.n_obstacles > 0:
+                for obstacle in self.get_obstacles():
+                    if obstacle['vx'] != 0 or obstacle['vy'] != 0:
+                        continue
+                    if 'd' in obstacle:      # Box obstacle
+                        left = int(scale * (obstacle['x'] - obstacle['d'] / 2) + offset)
+                        top = flip_y(int(scale * (obstacle['y'] + obstacle['d'] / 2) + offset))
+                        pygame.draw.rect(self._bg, obstacle_color, pygame.Rect(left, top, scale * obstacle['d'], scale * obstacle['d']))
+                    if 'r' in obstacle:
+                        pygame.draw.circle(self._bg, obstacle_color, (int(scale * obstacle['x'] + offset), flip_y(int(scale * obstacle['y'] + offset))), int(scale * obstacle['r']))
+        self.surf = self._bg.copy()
+
         # Plot the quadrotor as a line
         xc = int(scale * s[0] + offset)
-        yc = int(scale * s[2] + offset)
+        yc = flip_y(int(scale * s[2] + offset))
         x1 = xc + int(scale * 0.2 * cos(s[4]))
-        y1 = yc + int(scale * 0.2 * sin(s[4]))
+        y1 = yc - int(scale * 0.2 * sin(s[4]))
         x2 = xc - int(scale * 0.2 * cos(s[4]))
-        y2 = yc - int(scale * 0.2 * sin(s[4]))
+        y2 = yc + int(scale * 0.2 * sin(s[4]))
         pygame.draw.line(self.surf, (255, 64, 64), (x1, y1), (x2, y2), int(scale * 0.1))
-        pygame.draw.line(self.surf, (255, 64, 64), (xc, yc), (xc - int(scale * 0.2 * sin(s[4])), yc + int(scale * 0.2 * cos(s[4]))), int(scale * 0.1))
+        pygame.draw.line(self.surf, (255, 64, 64), (xc, yc), (xc - int(scale * 0.2 * sin(s[4])), yc - int(scale * 0.2 * cos(s[4]))), int(scale * 0.1))
 
         # Plot the target position as a dot
-        pygame.draw.circle(self.surf, (0, 0, 0), (int(scale * self.target[0] + offset), int(scale * self.target[1] + offset)), int(scale * 0.1))
+        pygame.draw.circle(self.surf, (0, 0, 0), (int(scale * self.target[0] + offset), flip_y(int(scale * self.target[1] + offset))), int(scale * 0.1))
 
-        # Plot the obstacles as squares
+        # Plot the moving obstacles; the static ones are already in the background
         if self.n_obstacles > 0:
-            for obstacle in self.obstacles:
+            for obstacle in self.get_obstacles():
+                if obstacle['vx'] == 0 and obstacle['vy'] == 0:
+                    continue
                 if 'd' in obstacle:      # Box obstacle
-                    left, top = int(scale * (obstacle['x'] - obstacle['d'] / 2) + offset), int(scale * (obstacle['y'] - obstacle['d'] / 2) + offset)
+                    left = int(scale * (obstacle['x'] - obstacle['d'] / 2) + offset)
+                    top = flip_y(int(scale * (obstacle['y'] + obstacle['d'] / 2) + offset))
                     pygame.draw.rect(self.surf, obstacle_color, pygame.Rect(left, top, scale * obstacle['d'], scale * obstacle['d']))
                 if 'r' in obstacle:
-                    pygame.draw.circle(self.surf, obstacle_color, (int(scale * obstacle['x'] + offset), int(scale * obstacle['y'] + offset)), int(scale * obstacle['r']))
+                    pygame.draw.circle(self.surf, obstacle_color, (int(scale * obstacle['x'] + offset), flip_y(int(scale * obstacle['y'] + offset))), int(scale * obstacle['r']))
 
         # Plot the predicted trajectories
         if trajectories_to_plot is not None:
             for _ in range(trajectories_to_plot.shape[0]):
                 traj = trajectories_to_plot[_]
                 traj = scale * traj + offset
+                traj[:, 1] = self.SCREEN_DIM - traj[:, 1]
                 color = (255, 64, 64) if _ == 0 else (64, 64, 255)
                 pygame.draw.lines(self.surf, color, False, list(map(tuple, traj.tolist())), 2)
 
         # Plot the old path
-        if old_path is not None:          
+        if old_path is not None:
             old_path = scale * old_path + offset
+            old_path[:, 1] = self.SCREEN_DIM - old_path[:, 1]
             pygame.draw.lines(self.surf, (0, 0, 0), False, list(map(tuple, old_path.tolist())), 1)
-        
-        self.surf = pygame.transform.flip(self.surf, False, True)
+
         self.screen.blit(self.surf, (0, 0))
         
         pygame.event.pump()
@@ -677,6 +937,205 @@ class Quad2DEnv(core.Env):
 
         return self.isopen
 
+class Quad2DVecEnv:
+    '''
+        Vectorized batch of planar quadrotor environments for fast dataset
+        generation. Holds the states of N independent quads as a single (N, 6)
+        array and advances all of them with batched RK4 integration per step.
+        Only the obstacle-free configuration used for dataset generation is
+        supported; use Quad2DEnv for single rollouts with obstacles.
+    '''
+
+    def __init__(self, num_envs=32, min_rel_thrust=0.75, max_rel_thrust=1.25,
+                 max_rel_thrust_difference=0.01, g=9.81, max_steps=100,
+                 num_episodes=1000, epsilon=0.2, reset_target_reached=False,
+                 reset_out_of_bounds=False, reward='squared_distance', seed=0):
+        self.num_envs = num_envs
+        self.dt = Quad2DEnv.dt
+        self.MASS = Quad2DEnv.MASS
+        self.LENGTH = Quad2DEnv.LENGTH
+        self.INERTIA = Quad2DEnv.INERTIA
+        self.GRAVITY = Quad2DEnv.GRAVITY
+        self.MAX_X = Quad2DEnv.MAX_X
+        self.MAX_Y = Quad2DEnv.MAX_Y
+        self.MAX_ANG = Quad2DEnv.MAX_ANG
+        self.MAX_VEL_X = Quad2DEnv.MAX_VEL_X
+        self.MAX_VEL_Y = Quad2DEnv.MAX_VEL_Y
+        self.MAX_VEL_ANG = Quad2DEnv.MAX_VEL_ANG
+        self.g = g
+
+        self.min_thrust = min_rel_thrust * self.MASS * self.GRAVITY / 2
+        self.max_thrust = max_rel_thrust * self.MASS * self.GRAVITY / 2
+        self.max_thrust_difference = max_rel_thrust_difference * self.MASS * self.GRAVITY
+
+        self.max_steps = max_steps
+        self.num_episodes = num_episodes
+        self.epsilon = epsilon
+        self.reset_target_reached = reset_target_reached
+        self.reset_out_of_bounds = reset_out_of_bounds
+        self.reward = reward
+
+        self._state_high = np.array(
+            [self.MAX_X, self.MAX_VEL_X, self.MAX_Y, self.MAX_VEL_Y, self.MAX_ANG, self.MAX_VEL_ANG]
+        )
+        self._state_low = -self._state_high
+        # The angle wraps instead of saturating, so it is excluded from the
+        # out-of-bounds test (mirrors Quad2DEnv._is_done in training mode)
+        self._oob_high = self._state_high[[0, 1, 2, 3, 5]] - 1e-4
+        self._oob_low = -self._oob_high
+
+        self.np_random = np.random.default_rng(seed)
+        self.states = np.empty((num_envs, 6))
+        self.targets = np.empty((num_envs, 2))
+        self.timestep = np.zeros(num_envs, dtype=np.int64)
+
+    def reset(self):
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self._get_obs()
+
+    def _reset_envs(self, mask):
+        # Rejection-sample states and targets for the masked envs until all are valid
+        max_acc = (self.max_thrust * 2 - self.MASS * self.GRAVITY) / self.MASS
+        idx = np.flatnonzero(mask)
+        while idx.size > 0:
+            n = idx.size
+            states = self.np_random.uniform(self._state_low, self._state_high, size=(n, 6))
+            targets = self.np_random.uniform(
+                [-self.MAX_X, -self.MAX_Y], [self.MAX_X, self.MAX_Y], size=(n, 2)
+            )
+            self.states[idx] = states
+            self.targets[idx] = targets
+            stop_x = states[:, 0] + np.sign(states[:, 1]) * 0.5 * states[:, 1] ** 2 / max_acc
+            stop_y = states[:, 2] + np.sign(states[:, 3]) * 0.5 * states[:, 3] ** 2 / max_acc
+            valid = (np.abs(stop_x) <= self.MAX_X) & (np.abs(stop_y) <= self.MAX_Y) & \
+                (np.hypot(states[:, 0] - targets[:, 0], states[:, 2] - targets[:, 1]) > self.epsilon)
+            idx = idx[~valid]
+        self.timestep[mask] = 0
+
+    def _dsdt_batch(self, s, a1, a2):
+        ds = np.empty_like(s)
+        thrust_acc = (a1 + a2) / self.MASS
+        ds[:, 0] = s[:, 1]
+        ds[:, 1] = -thrust_acc * np.sin(s[:, 4])
+        ds[:, 2] = s[:, 3]
+        ds[:, 3] = thrust_acc * np.cos(s[:, 4]) - self.g
+        ds[:, 4] = s[:, 5]
+        ds[:, 5] = self.LENGTH * (a1 - a2) / self.INERTIA
+        return ds
+
+    def step(self, a):
+        a = np.clip(a, self.min_thrust, self.max_thrust)
+        a1, a2 = a[:, 0], a[:, 1]
+
+        # Classical RK4 on the whole batch at once
+        dt = self.dt
+        dt2 = dt / 2.0
+        s = self.states
+        k1 = self._dsdt_batch(s, a1, a2)
+        k2 = self._dsdt_batch(s + dt2 * k1, a1, a2)
+        k3 = self._dsdt_batch(s + dt2 * k2, a1, a2)
+        k4 = self._dsdt_batch(s + dt * k3, a1, a2)
+        s = s + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+        np.clip(s[:, 0], -self.MAX_X, self.MAX_X, out=s[:, 0])
+        np.clip(s[:, 1], -self.MAX_VEL_X, self.MAX_VEL_X, out=s[:, 1])
+        np.clip(s[:, 2], -self.MAX_Y, self.MAX_Y, out=s[:, 2])
+        np.clip(s[:, 3], -self.MAX_VEL_Y, self.MAX_VEL_Y, out=s[:, 3])
+        s[:, 4] = ((s[:, 4] + self.MAX_ANG) % (2 * self.MAX_ANG)) - self.MAX_ANG
+        np.clip(s[:, 5], -self.MAX_VEL_ANG, self.MAX_VEL_ANG, out=s[:, 5])
+        self.states = s
+
+        distance = np.hypot(s[:, 0] - self.targets[:, 0], s[:, 2] - self.targets[:, 1])
+        reward = -distance ** 2 if self.reward == 'squared_distance' else -distance
+
+        target_reached = np.zeros(self.num_envs, dtype=bool)
+        done = self.timestep == self.max_steps - 1
+        if self.reset_target_reached:
+            target_reached = distance <= self.epsilon
+            done |= target_reached
+        if self.reset_out_of_bounds:
+            oob = s[:, [0, 1, 2, 3, 5]]
+            done |= ((oob <= self._oob_low) | (oob >= self._oob_high)).any(axis=1)
+
+        self.timestep += 1
+        return (self._get_obs(), reward, done, target_reached)
+
+    def _get_obs(self):
+        obs = np.empty((self.num_envs, 9), dtype=np.float32)
+        obs[:, :4] = self.states[:, :4]
+        obs[:, 4] = np.sin(self.states[:, 4])
+        obs[:, 5] = np.cos(self.states[:, 4])
+        obs[:, 6] = self.states[:, 5]
+        obs[:, 7:] = self.targets
+        return obs
+
+    def sample_actions(self):
+        a = np.empty((self.num_envs, 2))
+        a[:, 0] = self.np_random.uniform(self.min_thrust, self.max_thrust, size=self.num_envs)
+        a[:, 1] = a[:, 0] + self.np_random.uniform(
+            -self.max_thrust_difference, self.max_thrust_difference, size=self.num_envs
+        )
+        np.clip(a[:, 1], self.min_thrust, self.max_thrust, out=a[:, 1])
+        return a
+
+    def make_dataset(self):
+        keys = ['observations', 'actions', 'rewards', 'terminals', 'timeouts']
+        dataset = {key: [] for key in keys}
+
+        N, T = self.num_envs, self.max_steps
+        obs_scratch = np.empty((N, T, 9), dtype=np.float32)
+        act_scratch = np.empty((N, T, 2), dtype=np.float32)
+        rew_scratch = np.empty((N, T), dtype=np.float32)
+        term_scratch = np.empty((N, T), dtype=bool)
+        lengths = np.zeros(N, dtype=np.int64)
+        rows = np.arange(N)
+
+        episode = 0
+        obs = self.reset()
+        while episode < self.num_episodes:
+            action = self.sample_actions()
+            next_obs, reward, done, target_reached = self.step(action)
+
+            obs_scratch[rows, lengths] = obs
+            act_scratch[rows, lengths] = action
+            rew_scratch[rows, lengths] = reward
+            term_scratch[rows, lengths] = done
+            lengths += 1
+
+            # Flush finished episodes and auto-reset the corresponding envs
+            if done.any():
+                for i in np.flatnonzero(done):
+                    length = lengths[i]
+                    if length >= 16 and episode < self.num_episodes:
+                        dataset['observations'].append(obs_scratch[i, :length].copy())
+                        dataset['actions'].append(act_scratch[i, :length].copy())
+                        dataset['rewards'].append(rew_scratch[i, :length].copy())
+                        dataset['terminals'].append(term_scratch[i, :length].copy())
+                        timeouts = np.zeros(length, dtype=bool)
+                        timeouts[-1] = length == T
+                        dataset['timeouts'].append(timeouts)
+
+                        episode += 1
+                        if episode % 2000 == 0:
+                            print("Generated training episode %d of %d" % (episode, self.num_episodes))
+                self._reset_envs(done)
+                lengths[done] = 0
+                next_obs = self._get_obs()
+
+            obs = next_obs
+
+        dataset['observations'] = np.concatenate(dataset['observations'])
+        dataset['actions'] = np.concatenate(dataset['actions'])
+        dataset['rewards'] = np.concatenate(dataset['rewards'])[:, None]
+        dataset['terminals'] = np.concatenate(dataset['terminals'])[:, None]
+        dataset['timeouts'] = np.concatenate(dataset['timeouts'])[:, None]
+
+        print("Dataset shape: ", dataset['observations'].shape)
+
+        return dataset
+
+
+@njit(cache=True)
 def wrap(x, m, M):
     """Wraps ``x`` so m <= x <= M; but unlike ``bound()`` which
     truncates, ``wrap()`` wraps x around the coordinate system defined by m,M.\n
@@ -690,12 +1149,9 @@ def wrap(x, m, M):
     Returns:
         x: a scalar, wrapped
     """
-    diff = M - m
-    while x > M:
-        x = x - diff
-    while x < m:
-        x = x + diff
-    return x
+    # Branchless constant-time wrap; the while-loop version iterated once per
+    # period that x was out of range
+    return ((x - m) % (M - m)) + m
 
 
 def bound(x, m, M=None):
@@ -714,10 +1170,57 @@ def bound(x, m, M=None):
         M = m[1]
         m = m[0]
     # bound x between min (m) and Max (M)
-    return min(max(x, m), M)
+    return clamp(x, m, M)
+
+
+@njit(cache=True, inline='always')
+def clamp(x, m, M):
+    """Scalar clamp of ``x`` to [m, M]. Written as conditional expressions so
+    numba lowers it to conditional moves when inlined into a jitted kernel;
+    for arrays use ``np.clip`` instead.
 
+    Args:
+        x: a scalar
+        m: The lower bound
+        M: The upper bound
 
-def rk4(derivs, y0, t):
+    Returns:
+        x clamped between m and M
+    """
+    return m if x < m else (M if x > M else x)
+
+
+@functools.lru_cache(maxsize=None)
+def _make_rk4_jit(Ny):
+    # One jitted rk4 loop per state width: Ny is captured as a compile-time
+    # constant so LLVM fully unrolls the stage arithmetic for that width.
+    # The first call per width pays the compile, lru_cache serves the rest.
+    @njit(fastmath=True)
+    def _rk4_jit(derivs, y0, t):
+        # Taking the derivative function as a first-class jitted argument
+        # lets numba inline it, so the whole integration runs without
+        # interpreter dispatch between the stages
+        y = y0.copy()
+        y_next = np.empty(Ny)
+        for i in range(t.shape[0] - 1):
+            dt = t[i + 1] - t[i]
+            dt2 = dt / 2.0
+            dt6 = dt / 6.0
+            k1 = np.asarray(derivs(y))
+            k2 = np.asarray(derivs(y + dt2 * k1))
+            k3 = np.asarray(derivs(y + dt2 * k2))
+            k4 = np.asarray(derivs(y + dt * k3))
+            for j in range(Ny):
+                y_next[j] = y[j] + dt6 * (k1[j] + 2.0 * (k2[j] + k3[j]) + k4[j])
+            tmp = y
+            y = y_next
+            y_next = tmp
+        return y[:6]
+
+    return _rk4_jit
+
+
+def rk4(derivs, y0, t, method='rk4'):
     """
     Integrate 1-D or N-D system of ODEs using 4-th order Runge-Kutta.
 
@@ -737,31 +1240,387 @@ def rk4(derivs, y0, t):
         derivs: the derivative of the system and has the signature ``dy = derivs(yi)``
         y0: initial state vector
         t: sample times
+        method: 'rk4' (4 derivative evaluations per step, order 4),
+            'midpoint' (2 evaluations, order 2) or 'euler' (1 evaluation,
+            order 1). On a fine time grid the lower-order methods are often
+            accurate enough at a fraction of the cost
 
     Returns:
         yout: Runge-Kutta approximation of the ODE
+
+    If ``derivs`` is numba-compiled, the whole loop runs as native code with
+    the derivative inlined; otherwise the pure-Python loop below is used, so
+    the function works the same whether or not numba is installed.
+    """
+    if method not in ('rk4', 'midpoint', 'euler'):
+        raise ValueError("method must be 'rk4', 'midpoint' or 'euler'")
+
+    # If the derivative function is itself numba-compiled, run the whole
+    # loop inside the jitted kernel above and skip the interpreter entirely
+    if method == 'rk4' and _HAVE_NUMBA and hasattr(derivs, 'nopython_signatures'):
+        y0 = np.asarray(y0, dtype=np.float64)
+        return _make_rk4_jit(y0.shape[0])(derivs, y0,
+                                          np.asarray(t, dtype=np.float64))
+
+    N = len(t)
+    y = np.array(y0, dtype=np.float64)
+    Ny = len(y)
+
+    # Only the final state is ever returned, so instead of a (len(t), Ny)
+    # trajectory buffer two state vectors are kept and swapped each step.
+    # The stage and temporary buffers are allocated once up front and the
+    # loop writes into them in place, so the per-step allocation count of
+    # the original version (four fresh stage arrays plus the argument
+    # temporaries) drops to zero
+    y_next = np.empty(Ny)
+    k1 = np.empty(Ny)
+    k2 = np.empty(Ny)
+    k3 = np.empty(Ny)
+    k4 = np.empty(Ny)
+    ytmp = np.empty(Ny)
+
+    # Bind the ufuncs as locals so the loop body uses LOAD_FAST instead of
+    # repeated global/attribute lookups
+    add = np.add
+    mul = np.multiply
+
+    # The whole step-size schedule is computed up front: no per-iteration
+    # t[i+1]-t[i] indexing and no scalar divides inside the loop
+    dts = np.diff(t)
+    halves = dts * 0.5
+    sixths = dts / 6.0
+
+    for i in range(N - 1):
+
+        dt = dts[i]
+        dt2 = halves[i]
+
+        if method == 'rk4':
+            k1[:] = derivs(y)
+            mul(k1, dt2, out=ytmp)
+            add(y, ytmp, out=ytmp)
+            k2[:] = derivs(ytmp)
+            mul(k2, dt2, out=ytmp)
+            add(y, ytmp, out=ytmp)
+            k3[:] = derivs(ytmp)
+            mul(k3, dt, out=ytmp)
+            add(y, ytmp, out=ytmp)
+            k4[:] = derivs(ytmp)
+            # Weighted combination fused into the scratch buffer: one traversal
+            # and no temporaries instead of the five of the expression form
+            add(k2, k3, out=ytmp)
+            ytmp *= 2.0
+            ytmp += k1
+            ytmp += k4
+            ytmp *= sixths[i]
+            add(y, ytmp, out=y_next)
+        elif method == 'midpoint':
+            k1[:] = derivs(y)
+            mul(k1, dt2, out=ytmp)
+            add(y, ytmp, out=ytmp)
+            k2[:] = derivs(ytmp)
+            mul(k2, dt, out=ytmp)
+            add(y, ytmp, out=y_next)
+        else:   # euler
+            k1[:] = derivs(y)
+            mul(k1, dt, out=ytmp)
+            add(y, ytmp, out=y_next)
+        y, y_next = y_next, y
+    # We only care about the final timestep and we cleave off action value which will be zero
+    return y[:6]
+
+@njit(cache=True, fastmath=True)
+def rk4_6d_uniform(derivs, y0, nsteps, dt):
+    """
+    4-th order Runge-Kutta specialized to the 6-D quadrotor state on a
+    uniform time grid: the state width is hardcoded so the stage loops
+    unroll, ``dt/2`` and ``dt/6`` are computed once, and the generic
+    ``len(y0)`` probing of ``rk4`` is dropped. When numba is installed,
+    ``derivs`` must be numba-compiled as well.
+
+    Args:
+        derivs: the derivative of the system with the signature ``dy = derivs(yi)``
+        y0: initial state vector of length 6 (float64)
+        nsteps: number of integration steps
+        dt: fixed step size
+
+    Returns:
+        The state after ``nsteps`` steps of size ``dt``
+    """
+    dt2 = dt / 2.0
+    dt6 = dt / 6.0
+    y = y0.copy()
+    ytmp = np.empty(6)
+    for _ in range(nsteps):
+        k1 = np.asarray(derivs(y))
+        for j in range(6):
+            ytmp[j] = y[j] + dt2 * k1[j]
+        k2 = np.asarray(derivs(ytmp))
+        for j in range(6):
+            ytmp[j] = y[j] + dt2 * k2[j]
+        k3 = np.asarray(derivs(ytmp))
+        for j in range(6):
+            ytmp[j] = y[j] + dt * k3[j]
+        k4 = np.asarray(derivs(ytmp))
+        for j in range(6):
+            y[j] = y[j] + dt6 * (k1[j] + 2.0 * (k2[j] + k3[j]) + k4[j])
+    return y
+
+
+def rk4_batch(derivs, y0, t, dtype=np.float64):
     """
+    Integrate a batch of independent ODE systems with 4-th order Runge-Kutta.
 
-    try:
-        Ny = len(y0)
-    except TypeError:
-        yout = np.zeros((len(t),), np.float_)
-    else:
-        yout = np.zeros((len(t), Ny), np.float_)
+    One call advances all B states at once, so the Python/NumPy dispatch of
+    each stage is paid once per batch instead of once per trajectory. This is
+    the variant to use for parallel rollouts (planning samples, vectorized
+    environments); for a single trajectory use ``rk4``. It is the NumPy
+    equivalent of mapping a scan over the batch axis: only the time loop
+    stays in Python, every stage is one vectorized op over the whole batch.
 
-    yout[0] = y0[:Ny]
+    Args:
+        derivs: derivative of the systems with the signature ``dy = derivs(y)``,
+            taking and returning a ``(B, Ny)`` array
+        y0: initial state vectors, shape ``(B, Ny)``
+        t: sample times
+        dtype: working precision of the batch. float64 is the default for
+            fidelity; np.float32 halves the memory traffic and doubles the
+            SIMD width, which is plenty for sampled planning rollouts
 
-    for i in np.arange(len(t) - 1):
+    Returns:
+        The states at ``t[-1]``, shape ``(B, Ny)``
+    """
+    y = np.array(y0, dtype=dtype)
 
-        this = t[i]
-        dt = t[i + 1] - this
+    for i in range(len(t) - 1):
+        # Keep the step scalars in the working dtype so float32 batches are
+        # not silently upcast by the stage arithmetic
+        dt = dtype(t[i + 1] - t[i])
         dt2 = dt / 2.0
-        y0 = yout[i]
 
-        k1 = np.asarray(derivs(y0))
-        k2 = np.asarray(derivs(y0 + dt2 * k1))
-        k3 = np.asarray(derivs(y0 + dt2 * k2))
-        k4 = np.asarray(derivs(y0 + dt * k3))
-        yout[i + 1] = y0 + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
-    # We only care about the final timestep and we cleave off action value which will be zero
-    return yout[-1][:6]
\ No newline at end of file
+        k1 = derivs(y)
+        k2 = derivs(y + dt2 * k1)
+        k3 = derivs(y + dt2 * k2)
+        k4 = derivs(y + dt * k3)
+        y = y + dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+    return y
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _rk4_batch_parallel_jit(derivs, y0, t):
+    # One worker thread per trajectory; each thread integrates its own row
+    # with thread-local stage buffers, so the rows never share state
+    B, Ny = y0.shape
+    out = np.empty((B, Ny))
+    for b in prange(B):
+        y = y0[b].copy()
+        for i in range(t.shape[0] - 1):
+            dt = t[i + 1] - t[i]
+            dt2 = dt / 2.0
+            dt6 = dt / 6.0
+            k1 = np.asarray(derivs(y))
+            k2 = np.asarray(derivs(y + dt2 * k1))
+            k3 = np.asarray(derivs(y + dt2 * k2))
+            k4 = np.asarray(derivs(y + dt * k3))
+            for j in range(Ny):
+                y[j] = y[j] + dt6 * (k1[j] + 2.0 * (k2[j] + k3[j]) + k4[j])
+        out[b] = y
+    return out
+
+
+def rk4_batch_parallel(derivs, y0, t):
+    """
+    Integrate a batch of independent ODE systems with one worker thread per
+    trajectory, the CPU analogue of the one-thread-per-ODE GPU pattern.
+
+    Unlike ``rk4_batch``, which vectorizes each stage across the batch,
+    ``derivs`` here operates on a single state vector and each trajectory is
+    integrated independently, so the batch scales across cores. Requires a
+    numba-compiled ``derivs`` to parallelize; without numba the rows are
+    integrated sequentially.
+
+    Args:
+        derivs: the derivative of one system with the signature ``dy = derivs(yi)``
+        y0: initial state vectors, shape ``(B, Ny)``
+        t: sample times
+
+    Returns:
+        The states at ``t[-1]``, shape ``(B, Ny)``
+    """
+    y0 = np.asarray(y0, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    if _HAVE_NUMBA and hasattr(derivs, 'nopython_signatures'):
+        return _rk4_batch_parallel_jit(derivs, y0, t)
+    # Sequential fallback for plain Python derivative functions
+    out = y0.copy()
+    for b in range(out.shape[0]):
+        y = out[b]
+        for i in range(len(t) - 1):
+            dt = t[i + 1] - t[i]
+            dt2 = dt / 2.0
+            k1 = np.asarray(derivs(y))
+            k2 = np.asarray(derivs(y + dt2 * k1))
+            k3 = np.asarray(derivs(y + dt2 * k2))
+            k4 = np.asarray(derivs(y + dt * k3))
+            y += dt / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
+    return out
+
+
+def rk4_scipy(derivs, y0, t, method='LSODA', rtol=1e-4, atol=1e-6):
+    """
+    Integrate an N-D system with SciPy's compiled adaptive solvers,
+    preserving the ``rk4`` call contract (only ``t[0]`` and ``t[-1]`` are
+    used and the state at ``t[-1]`` is returned).
+
+    The step loop runs inside SciPy's compiled LSODA (or any other
+    ``solve_ivp`` method), which also switches automatically between stiff
+    and non-stiff modes, so nothing per step happens in the interpreter
+    except the derivative callback itself.
+
+    Args:
+        derivs: the derivative of the system with the signature ``dy = derivs(yi)``
+        y0: initial state vector
+        t: sample times; only ``t[0]`` and ``t[-1]`` are used
+        method: any ``solve_ivp`` method name
+        rtol: relative tolerance
+        atol: absolute tolerance
+
+    Returns:
+        The approximation of the state at ``t[-1]``
+    """
+    sol = solve_ivp(lambda tt, yy: np.asarray(derivs(yy), dtype=np.float64),
+                    (t[0], t[-1]), np.asarray(y0, dtype=np.float64),
+                    method=method, t_eval=[t[-1]], dense_output=False,
+                    rtol=rtol, atol=atol)
+    return sol.y[:6, -1]
+
+
+def quad_jacobian(s, a1, a2, m=Quad2DEnv.MASS):
+    """
+    Analytic 6x6 Jacobian of the planar quadrotor dynamics with respect to
+    the state. The dynamics are closed-form, so the Jacobian is mostly zeros
+    with unit entries for the kinematic couplings and two trig terms from
+    the thrust direction.
+
+    Args:
+        s: state vector [x, dx, y, dy, theta, dtheta]
+        a1: thrust of the first propeller
+        a2: thrust of the second propeller
+        m: mass of the quadrotor
+
+    Returns:
+        The (6, 6) Jacobian d(ds/dt)/ds
+    """
+    J = np.zeros((6, 6))
+    J[0, 1] = 1.0
+    J[2, 3] = 1.0
+    J[4, 5] = 1.0
+    thrust_acc = (a1 + a2) / m
+    J[1, 4] = -thrust_acc * math.cos(s[4])
+    J[3, 4] = -thrust_acc * math.sin(s[4])
+    return J
+
+
+def rosenbrock2(derivs, jac, y0, t):
+    """
+    Integrate an N-D system with a 2-stage Rosenbrock method using an
+    analytic Jacobian.
+
+    The linearly implicit stages make the method L-stable, so near stiffness
+    (e.g. strong actuator saturation) it takes steps that would blow up an
+    explicit integrator of the same cost. Each step solves two linear
+    systems against the same factorizable matrix.
+
+    Args:
+        derivs: the derivative of the system with the signature ``dy = derivs(yi)``
+        jac: the Jacobian of ``derivs`` with the signature ``J = jac(yi)``,
+            returning an ``(Ny, Ny)`` array (see ``quad_jacobian``)
+        y0: initial state vector
+        t: sample times
+
+    Returns:
+        The approximation of the state at ``t[-1]``
+    """
+    gamma = 1.0 + 1.0 / math.sqrt(2.0)
+    y = np.array(y0, dtype=np.float64)
+    Ny = len(y)
+    eye = np.eye(Ny)
+
+    for i in range(len(t) - 1):
+        h = t[i + 1] - t[i]
+        A = eye - (gamma * h) * np.asarray(jac(y))
+        f0 = np.asarray(derivs(y))
+        k1 = np.linalg.solve(A, f0)
+        f1 = np.asarray(derivs(y + h * k1))
+        k2 = np.linalg.solve(A, f1 - 2.0 * k1)
+        y = y + h * (1.5 * k1 + 0.5 * k2)
+
+    return y[:6]
+
+
+def rk45(derivs, y0, t, atol=1e-6, rtol=1e-3):
+    """
+    Integrate an N-D system of ODEs from ``t[0]`` to ``t[-1]`` with the
+    adaptive Dormand-Prince 5(4) method and return the state at ``t[-1]``.
+
+    Unlike ``rk4``, which pays four derivative evaluations at every point of
+    the sample grid even though only the endpoint is used, the embedded 5(4)
+    pair picks its own step size from the local error estimate and typically
+    crosses the interval in far fewer steps for smooth dynamics.
+
+    Args:
+        derivs: the derivative of the system with the signature ``dy = derivs(yi)``
+        y0: initial state vector
+        t: sample times; only ``t[0]`` and ``t[-1]`` are used
+        atol: absolute tolerance of the local error estimate
+        rtol: relative tolerance of the local error estimate
+
+    Returns:
+        The Runge-Kutta approximation of the state at ``t[-1]``
+    """
+    y = np.array(y0, dtype=np.float64)
+    ti = float(t[0])
+    t_end = float(t[-1])
+    # Start from the caller's grid spacing; the controller adapts from there
+    h = float(t[1]) - ti if len(t) > 1 else t_end - ti
+
+    # First stage of the first step; afterwards the first-same-as-last
+    # property supplies it from the previous step's k7
+    k1 = np.asarray(derivs(y))
+
+    while ti < t_end:
+        h = min(h, t_end - ti)
+
+        k2 = np.asarray(derivs(y + h * (1 / 5 * k1)))
+        k3 = np.asarray(derivs(y + h * (3 / 40 * k1 + 9 / 40 * k2)))
+        k4 = np.asarray(derivs(y + h * (44 / 45 * k1 - 56 / 15 * k2 + 32 / 9 * k3)))
+        k5 = np.asarray(derivs(y + h * (19372 / 6561 * k1 - 25360 / 2187 * k2
+                                        + 64448 / 6561 * k3 - 212 / 729 * k4)))
+        k6 = np.asarray(derivs(y + h * (9017 / 3168 * k1 - 355 / 33 * k2
+                                        + 46732 / 5247 * k3 + 49 / 176 * k4
+                                        - 5103 / 18656 * k5)))
+        y_new = y + h * (35 / 384 * k1 + 500 / 1113 * k3 + 125 / 192 * k4
+                         - 2187 / 6784 * k5 + 11 / 84 * k6)
+        k7 = np.asarray(derivs(y_new))
+
+        # Difference between the 5th- and 4th-order solutions
+        e = h * ((35 / 384 - 5179 / 57600) * k1 + (500 / 1113 - 7571 / 16695) * k3
+                 + (125 / 192 - 393 / 640) * k4 + (-2187 / 6784 + 92097 / 339200) * k5
+                 + (11 / 84 - 187 / 2100) * k6 - 1 / 40 * k7)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err = math.sqrt(np.mean((e / scale) ** 2))
+
+        if err <= 1.0:
+            ti += h
+            y = y_new
+            # FSAL: k7 was evaluated at the accepted point, so it is the k1
+            # of the next step; on rejection k1 stays valid for the same y
+            k1 = k7
+        # Standard step-size controller, clipped to [0.2, 5] per step
+        if err > 0.0:
+            h *= min(5.0, max(0.2, 0.9 * err ** (-1 / 6)))
+        else:
+            h *= 5.0
+
+    return y[:6]